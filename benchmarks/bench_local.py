@@ -0,0 +1,71 @@
+# benchmarks/bench_local.py
+# Purpose: Measure local extract validation throughput as the process pool grows
+#
+# Usage:
+#   python benchmarks/bench_local.py --files 8 --rows 200000 --processes 1,2,4,8
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "smoketest"))
+
+from local_files import aggregate, discover  # noqa: E402
+
+
+# Write `files` Parquet part files of `rows` rows each under directory/bench/
+def generate(directory, files, rows, row_group_rows):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    table_dir = os.path.join(directory, "bench")
+    os.makedirs(table_dir, exist_ok=True)
+    for part in range(files):
+        start = part * rows
+        ids = pa.array(range(start, start + rows), pa.int64())
+        table = pa.table({
+            "id": ids,
+            "category": [None if i % 20 == 0 else f"c{i % 50}" for i in range(start, start + rows)],
+            "amount": [i * 0.5 for i in range(start, start + rows)]
+        })
+        pq.write_table(table, os.path.join(table_dir, f"part-{part:04d}.parquet"), row_group_size=row_group_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark process-pool validation of local Parquet extracts.")
+    parser.add_argument("--directory", help="Extract directory to (re)generate; defaults to a temporary one")
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--row-group-rows", type=int, default=50000)
+    parser.add_argument("--processes", default="1,2,4")
+    parser.add_argument("--output", default="bench_local_results.json")
+    args = parser.parse_args()
+
+    directory = args.directory or tempfile.mkdtemp()
+    generate(directory, args.files, args.rows, args.row_group_rows)
+    tables = discover(directory)
+
+    results = {"cpus": os.cpu_count(), "params": vars(args), "runs": {}}
+    baseline = None
+    for processes in [int(p) for p in args.processes.split(",")]:
+        started = time.perf_counter()
+        merged, errors = aggregate(tables, processes)
+        wall = time.perf_counter() - started
+        if errors:
+            sys.exit(f"Aggregation failed: {errors}")
+        rows = merged["bench"].rows
+        baseline = baseline or wall
+        results["runs"][processes] = {"wall_seconds": round(wall, 6), "rows_per_second": round(rows / wall),
+                                      "speedup": round(baseline / wall, 2), "checksum": merged["bench"].checksum}
+        print(f"{processes:>3} processes: {rows / wall:>12,.0f} rows/s  speedup {baseline / wall:.2f}x  "
+              f"checksum {merged['bench'].checksum:016x}")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output} ({os.cpu_count()} CPUs)")
+
+
+if __name__ == "__main__":
+    main()
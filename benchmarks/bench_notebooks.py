@@ -0,0 +1,94 @@
+# benchmarks/bench_notebooks.py
+# Purpose: Measure notebook startup (parse + compile) for the local runner without, cold and warm against the
+# compiled-cell cache, optionally end to end through the process pool
+#
+# Usage:
+#   python benchmarks/bench_notebooks.py --notebooks 200 --cells 20
+#   python benchmarks/bench_notebooks.py --notebooks 50 --end-to-end --processes 4
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "notebooks"))
+
+from cell_cache import CellCache  # noqa: E402
+from run_notebooks import HEADER, SEPARATOR, load, run_all  # noqa: E402
+
+# A typical transformation cell: a helper function and a call to it
+CELL_TEMPLATE = '''# Step {cell}: derive metrics
+def step_{cell}(rows, factor={cell}):
+    totals = {{}}
+    for row in rows:
+        key = (row["region"], row["day"] % 7)
+        amount = row["amount"] * factor
+        if amount < 0:
+            continue
+        totals[key] = totals.get(key, 0) + amount
+    ordered = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+    return [{{"region": region, "weekday": weekday, "total": round(total, 2)}} for (region, weekday), total in ordered]
+
+
+metrics_{cell} = step_{cell}([{{"region": "r%d" % (i % 5), "day": i, "amount": i * 1.5}} for i in range(20)])
+'''
+
+
+def generate(directory, notebooks, cells):
+    paths = []
+    for n in range(notebooks):
+        blocks = [f"# MAGIC %md\n# MAGIC # Generated notebook {n}"]
+        blocks += [CELL_TEMPLATE.format(cell=c) for c in range(cells)]
+        path = os.path.join(directory, f"notebook_{n:04d}.py")
+        with open(path, "w") as f:
+            f.write(HEADER + "\n" + f"\n\n{SEPARATOR}\n\n".join(blocks))
+        paths.append(path)
+    return paths
+
+
+# Seconds to load (parse + compile, or read from the cache) every notebook once, in this process
+def startup(paths, cache):
+    started = time.perf_counter()
+    for path in paths:
+        load(path, cache)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark notebook startup with and without the cell cache.")
+    parser.add_argument("--notebooks", type=int, default=200)
+    parser.add_argument("--cells", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3, help="Best of this many warm / uncached passes")
+    parser.add_argument("--end-to-end", action="store_true", help="Also time full runs through the process pool")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--output", default="bench_notebooks_results.json")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    os.makedirs(os.path.join(directory, "notebooks"))
+    paths = generate(os.path.join(directory, "notebooks"), args.notebooks, args.cells)
+    cache_dir = os.path.join(directory, "cache")
+
+    results = {"uncached": min(startup(paths, None) for _ in range(args.repeat))}
+    results["cold"] = startup(paths, CellCache(cache_dir))
+    results["warm"] = min(startup(paths, CellCache(cache_dir)) for _ in range(args.repeat))
+    if args.end_to_end:
+        for name, directory_arg in (("end_to_end_uncached", None), ("end_to_end_warm", cache_dir)):
+            started = time.perf_counter()
+            runs = run_all(paths, processes=args.processes, cache_dir=directory_arg)
+            results[name] = time.perf_counter() - started
+            assert all(run.ok for run in runs), [run.error for run in runs if not run.ok][:1]
+
+    cells = args.notebooks * args.cells
+    for name, seconds in results.items():
+        print(f"{name:20s} {seconds:8.3f}s  ({seconds / cells * 1e6:7.1f} us per cell)")
+    print(f"warm startup is {results['uncached'] / results['warm']:.1f}x faster than parsing and compiling")
+
+    with open(args.output, "w") as f:
+        json.dump({"params": vars(args), "seconds": {k: round(v, 6) for k, v in results.items()}}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
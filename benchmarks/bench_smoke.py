@@ -0,0 +1,250 @@
+# benchmarks/bench_smoke.py
+# Purpose: Benchmark the smoke test harness against a synthetic local database (no network)
+#
+# Usage:
+#   python benchmarks/bench_smoke.py --tables 200 --rows 10000 --output bench_results.json
+#   python benchmarks/bench_smoke.py --backend duckdb --latency-ms 20 --compare bench_results.json
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "smoketest"))
+
+import arrow_eval  # noqa: E402
+from async_runner import run_checks_async  # noqa: E402
+from backends import get_backend  # noqa: E402
+from connection_pool import ConnectionPool  # noqa: E402
+from planner import mode_plan, plan_batches  # noqa: E402
+from rules import TablePlan, build_rule  # noqa: E402
+from smoke_test import make_check, plan_items, run_checks  # noqa: E402
+from timing import TimingRecorder  # noqa: E402
+
+SCENARIOS = ("single", "pooled", "batched", "batched-arrow", "async")
+
+
+# Populate `tables` synthetic tables of `rows` rows each; ~5% of category values are NULL
+def generate(backend, tables, rows):
+    connection = backend.connect()
+    names = [f"bench_{i:04d}" for i in range(tables)]
+    cursor = connection.cursor()
+    for name in names:
+        cursor.execute(f"DROP TABLE IF EXISTS {name}")
+        if backend.name == "duckdb":
+            cursor.execute(
+                f"CREATE TABLE {name} AS SELECT range AS id, "
+                f"CASE WHEN range % 20 = 0 THEN NULL ELSE 'c' || (range % 50) END AS category, "
+                f"range * 0.5 AS amount, TIMESTAMP '2024-01-01' + to_seconds(range) AS created_at "
+                f"FROM range({rows})"
+            )
+        else:
+            cursor.execute(
+                f"CREATE TABLE {name} AS WITH RECURSIVE seq(n) AS "
+                f"(SELECT 0 UNION ALL SELECT n + 1 FROM seq WHERE n + 1 < {rows}) "
+                f"SELECT n AS id, CASE WHEN n % 20 = 0 THEN NULL ELSE 'c' || (n % 50) END AS category, "
+                f"n * 0.5 AS amount, datetime('2024-01-01', '+' || n || ' seconds') AS created_at FROM seq"
+            )
+    connection.commit()
+    cursor.close()
+    connection.close()
+    return names
+
+
+# Simulated warehouse round trip: every execute sleeps latency seconds first
+class LatencyCursor:
+    def __init__(self, cursor, latency):
+        self._cursor = cursor
+        self._latency = latency
+
+    def execute(self, *args, **kwargs):
+        time.sleep(self._latency)
+        return self._cursor.execute(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class LatencyConnection:
+    def __init__(self, connection, latency):
+        self._connection = connection
+        self._latency = latency
+
+    def cursor(self):
+        return LatencyCursor(self._connection.cursor(), self._latency)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def rule_plans(backend, tables):
+    specs = [
+        {"type": "row_count", "min": 1},
+        {"type": "null_rate", "column": "category", "max": 0.1},
+        {"type": "unique", "columns": ["id"]}
+    ]
+    return {t: TablePlan(t, [build_rule(spec) for spec in specs], backend) for t in tables}
+
+
+# Run one scenario and return its measurements
+def run_scenario(scenario, backend, tables, args):
+    latency = args.latency_ms / 1000
+
+    def connect():
+        # Connection setup pays a round trip too
+        time.sleep(latency)
+        return LatencyConnection(backend.connect(), latency)
+
+    plans = rule_plans(backend, tables) if args.rules else {}
+    recorder = TimingRecorder(os.devnull)
+    check = recorder.wrap_check(make_check(args.mode, plans))
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    if scenario == "single":
+        # Baseline: one fresh connection per table, sequentially, like the original script
+        results = []
+        for table in tables:
+            connection = connect()
+            try:
+                results.append(check(connection, table))
+            finally:
+                connection.close()
+    else:
+        batch_size = args.batch_size if scenario.startswith("batched") else 1
+        items = plan_items(tables, args.mode, plans, backend, batch_size, arrow=scenario == "batched-arrow")
+        with ConnectionPool(connect, size=args.workers) as pool:
+            timed_pool = recorder.wrap_pool(pool)
+            if scenario == "async":
+                results = run_checks_async(items, timed_pool, args.workers, check).results
+            else:
+                results = run_checks(items, timed_pool, args.workers, check)
+    wall = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    recorder.close()
+
+    failed = [r.table for r in results if not r.passed]
+    return {
+        "wall_seconds": round(wall, 6),
+        "checks": len(results),
+        "checks_per_second": round(len(results) / wall, 2) if wall else None,
+        "statements": len(recorder.records),
+        "failed": len(failed),
+        "peak_memory_bytes": peak,
+        "latency": recorder.percentiles()
+    }
+
+
+# Time fetch + evaluation of every batch with Python tuples vs Arrow columns; execution is left out of the
+# timed region. Each path runs its own batches: string columns parsed in Python vs typed Arrow columns.
+def decode_comparison(backend, tables, args, repeat=5):
+    plans = rule_plans(backend, tables) if args.rules else {}
+    table_plans = [plans.get(t) or mode_plan(t, args.mode, backend) for t in tables]
+    batches = {False: plan_batches(table_plans, args.batch_size, backend, arrow=False),
+               True: plan_batches(table_plans, args.batch_size, backend, arrow=True)}
+    connection = backend.connect()
+
+    def tuples(batch, cursor):
+        by_index = {row[0]: row[1:] for row in cursor.fetchall()}
+        for i, plan in enumerate(batch.plans):
+            plan.evaluate(batch.metric_values(i, by_index[i]), 0.0)
+        return True
+
+    # Returns False when pyarrow or the driver has no Arrow result path
+    def arrow(batch, cursor):
+        table = backend.fetch_arrow(cursor) if batch.arrow else None
+        if table is None:
+            return False
+        arrow_eval.evaluate_batch(batch, table)
+        return True
+
+    def timed(decode, arrow):
+        spent = 0.0
+        for _ in range(repeat):
+            for batch in batches[arrow]:
+                cursor = connection.cursor()
+                cursor.execute(batch.sql())
+                started = time.perf_counter()
+                if not decode(batch, cursor):
+                    return None
+                spent += time.perf_counter() - started
+                cursor.close()
+        return round(spent / repeat, 6)
+
+    try:
+        return {"plans": len(table_plans), "tuple_seconds": timed(tuples, False),
+                "arrow_seconds": timed(arrow, True)}
+    finally:
+        connection.close()
+
+
+# Print the throughput change of each scenario relative to a previous results file
+def compare(current, previous_path):
+    with open(previous_path) as f:
+        previous = json.load(f)
+    for scenario, result in current["scenarios"].items():
+        before = previous.get("scenarios", {}).get(scenario)
+        if not before or not before.get("checks_per_second"):
+            continue
+        change = (result["checks_per_second"] - before["checks_per_second"]) / before["checks_per_second"] * 100
+        print(f"{scenario:>14}: {before['checks_per_second']:.1f} -> {result['checks_per_second']:.1f} checks/s "
+              f"({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the smoke test harness against a local engine.")
+    parser.add_argument("--backend", default="sqlite", choices=("sqlite", "duckdb"))
+    parser.add_argument("--database", help="Database file to (re)generate; defaults to a temporary file")
+    parser.add_argument("--tables", type=int, default=100)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=25)
+    parser.add_argument("--mode", default="count", choices=("probe", "count"))
+    parser.add_argument("--rules", action="store_true", help="Check every table with aggregated rules")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated round-trip latency")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="Previous results file to compare throughput against")
+    args = parser.parse_args()
+
+    database = args.database or os.path.join(tempfile.mkdtemp(), f"bench.{args.backend}")
+    backend = get_backend(args.backend, {"SMOKE_TEST_DATABASE": database})
+    tables = generate(backend, args.tables, args.rows)
+
+    current = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "scenarios": {}
+    }
+    for scenario in args.scenarios.split(","):
+        result = run_scenario(scenario, backend, tables, args)
+        current["scenarios"][scenario] = result
+        total = result["latency"]["total"]
+        print(f"{scenario:>14}: {result['checks_per_second']:>10.1f} checks/s  "
+              f"p50 {total['p50'] * 1000:.2f}ms  p95 {total['p95'] * 1000:.2f}ms  p99 {total['p99'] * 1000:.2f}ms  "
+              f"peak {result['peak_memory_bytes'] / 1024:.0f} KiB  ({result['statements']} statements)")
+
+    decode = decode_comparison(backend, tables, args)
+    current["decode"] = decode
+    if decode["arrow_seconds"] is None:
+        print(f"        decode: tuples {decode['tuple_seconds'] * 1000:.2f}ms for {decode['plans']} plans "
+              f"(no Arrow path for {args.backend})")
+    else:
+        print(f"        decode: tuples {decode['tuple_seconds'] * 1000:.2f}ms, arrow {decode['arrow_seconds'] * 1000:.2f}ms "
+              f"for {decode['plans']} plans")
+
+    with open(args.output, "w") as f:
+        json.dump(current, f, indent=2)
+    print(f"Results written to {args.output}")
+    if args.compare:
+        compare(current, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# notebooks/cell_cache.py
+# Purpose: On-disk cache of parsed, compiled notebook cells for the local runner
+#
+# One file per notebook: "<path hash>-<content hash>.<cache tag>.bin" holding the marshalled cells (code objects
+# included). The content hash covers the notebook text, so any edit misses and the entry is replaced; the
+# interpreter's cache tag (e.g. cpython-311) keeps code objects from another Python version out, as
+# __pycache__ does. Writes are atomic, so parallel runner processes can share the directory; unreadable
+# entries count as misses.
+
+import hashlib
+import marshal
+import os
+import sys
+
+DEFAULT_CACHE_DIR = ".notebook-cache"
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode()).hexdigest()[:32]
+
+
+class CellCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.directory = directory
+        self.tag = sys.implementation.cache_tag
+        self.hits = 0
+        self.misses = 0
+
+    def _prefix(self, path):
+        return _digest(os.path.abspath(path))
+
+    def _file(self, path, text):
+        return os.path.join(self.directory, f"{self._prefix(path)}-{_digest(text)}.{self.tag}.bin")
+
+    # The cached value for this notebook text, or None
+    def get(self, path, text):
+        try:
+            with open(self._file(path, text), "rb") as f:
+                value = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    # Store a marshal-able value for this notebook text, dropping entries for its older versions
+    def put(self, path, text, value):
+        os.makedirs(self.directory, exist_ok=True)
+        target = self._file(path, text)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            marshal.dump(value, f)
+        os.replace(tmp, target)
+        prefix = f"{self._prefix(path)}-"
+        for name in os.listdir(self.directory):
+            if name.startswith(prefix) and name.endswith(".bin") and os.path.join(self.directory, name) != target:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
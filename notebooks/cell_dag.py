@@ -0,0 +1,231 @@
+# notebooks/cell_dag.py
+# Purpose: Dependency-aware parallel cell scheduling - read/write name sets per cell from the AST, a DAG of
+# the orderings that matter, and a thread pool running every cell whose predecessors are done
+#
+# Cell j depends on an earlier cell i when j reads a name i writes, writes a name i reads, or both write the
+# same name, so every name is seen with the value in-order execution would give it. Writes are module-level
+# bindings (assignments, defs, imports, `global`), item/attribute assignment on a name, and method calls on a
+# name that is not an imported module (`df.append(...)`, `spark.sql(...)`): in-place mutation cannot be told
+# apart from a read, so a shared object is assumed to change. Cells using exec/eval/globals/locals/vars,
+# `import *`, or %run are barriers that run alone. A function or class reads globals when it is called, not
+# where it is defined, so a cell naming a top-level def/class also reads the globals its body reads and writes
+# the globals its body assigns (via `global`) or mutates (transitively through other defs). Effects outside
+# the namespace (files, tables) are not tracked; notebooks that depend on them should keep running in order.
+
+import ast
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+DYNAMIC_NAMESPACE = ("exec", "eval", "globals", "locals", "vars")
+
+
+class _Names(ast.NodeVisitor):
+    def __init__(self):
+        self.reads = set()
+        self.writes = set()
+        self.receivers = set()
+        self.modules = set()
+        # {top-level def/class name: globals its body reads}
+        self.bodies = {}
+        # {top-level def/class name: globals its body assigns or mutates}
+        self.body_writes = {}
+        self.barrier = False
+        self._depth = 0
+        self._body = None
+
+    def _nested(self, nodes):
+        self._depth += 1
+        for node in nodes:
+            self.visit(node)
+        self._depth -= 1
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Load):
+            self.reads.add(node.id)
+            if self._body is not None:
+                self._body[0].add(node.id)
+        elif self._depth == 0:
+            self.writes.add(node.id)
+        elif self._body is not None:
+            self._body[1].add(node.id)
+
+    def visit_Global(self, node):
+        self.writes.update(node.names)
+        if self._body is not None:
+            self._body[2].update(node.names)
+
+    # A name whose object is changed in place (item/attribute store, method call) inside a def/class body
+    def _mutated(self, root):
+        if root and self._body is not None:
+            self._body[3].add(root)
+
+    def _define(self, node, arguments, body, params=()):
+        if self._depth == 0:
+            self.writes.add(node.name)
+        for child in getattr(node, "decorator_list", []) + list(arguments):
+            self.visit(child)
+        if self._depth > 0:
+            if self._body is not None:
+                self._body[1].add(node.name)
+            self._nested(list(params) + body)
+            return
+        # (loads, local bindings, declared global, mutated) inside the body; the locals are not globals
+        self._body = (set(), set(), set(), set())
+        self._nested(list(params) + body)
+        loads, local, declared, mutated = self._body
+        self._body = None
+        self.bodies[node.name] = loads - (local - declared)
+        self.body_writes[node.name] = declared | (mutated - (local - declared))
+
+    def visit_FunctionDef(self, node):
+        args = node.args
+        params = args.posonlyargs + args.args + args.kwonlyargs + [a for a in (args.vararg, args.kwarg) if a]
+        self._define(node, args.defaults + [d for d in args.kw_defaults if d], node.body, params)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_arg(self, node):
+        if self._body is not None:
+            self._body[1].add(node.arg)
+
+    def visit_ClassDef(self, node):
+        self._define(node, node.bases + node.keywords, node.body)
+
+    def visit_Lambda(self, node):
+        for child in node.args.defaults + [d for d in node.args.kw_defaults if d]:
+            self.visit(child)
+        args = node.args
+        for arg in args.posonlyargs + args.args + args.kwonlyargs + [a for a in (args.vararg, args.kwarg) if a]:
+            self.visit(arg)
+        self._nested([node.body])
+
+    def _comprehension(self, node):
+        self._nested(node.generators + ([node.key, node.value] if isinstance(node, ast.DictComp) else [node.elt]))
+
+    visit_ListComp = visit_SetComp = visit_GeneratorExp = visit_DictComp = _comprehension
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            name = alias.asname or alias.name.split(".")[0]
+            self.writes.add(name)
+            self.modules.add(name)
+
+    def visit_ImportFrom(self, node):
+        for alias in node.names:
+            if alias.name == "*":
+                self.barrier = True
+            else:
+                self.writes.add(alias.asname or alias.name)
+
+    # x.attr = ..., x[k] = ..., del x[k]: the root name changes
+    def _target(self, node):
+        if not isinstance(node.ctx, ast.Load):
+            root = _root(node)
+            if root:
+                self.writes.add(root)
+            self._mutated(root)
+        self.generic_visit(node)
+
+    visit_Attribute = visit_Subscript = _target
+
+    def visit_Call(self, node):
+        if isinstance(node.func, ast.Name) and node.func.id in DYNAMIC_NAMESPACE:
+            self.barrier = True
+        elif isinstance(node.func, ast.Attribute):
+            root = _root(node.func.value)
+            if root:
+                self.receivers.add(root)
+            self._mutated(root)
+        self.generic_visit(node)
+
+
+def _root(node):
+    while isinstance(node, (ast.Attribute, ast.Subscript)):
+        node = node.value
+    return node.id if isinstance(node, ast.Name) else None
+
+
+def analyze(source):
+    names = _Names()
+    names.visit(ast.parse(source))
+    return names
+
+
+# `reads` plus, transitively, the globals read by the bodies of the defs/classes it names
+def called_reads(reads, bodies):
+    reads = set(reads)
+    pending = [name for name in reads if name in bodies]
+    while pending:
+        for name in bodies[pending.pop()] - reads:
+            reads.add(name)
+            if name in bodies:
+                pending.append(name)
+    return reads
+
+
+# {cell: set of earlier cells it must wait for}; a source of None is a barrier
+def build_dag(sources):
+    analyzed = [None if source is None else analyze(source) for source in sources]
+    modules = set().union(*(a.modules for a in analyzed if a))
+    bodies, body_writes = {}, {}
+    for a in analyzed:
+        for name, reads in (a.bodies.items() if a else ()):
+            bodies.setdefault(name, set()).update(reads)
+            body_writes.setdefault(name, set()).update(a.body_writes[name])
+    sets = []
+    for a in analyzed:
+        if a is None or a.barrier:
+            sets.append(None)
+        else:
+            reads = called_reads(a.reads, bodies)
+            # Calling a def/class runs its body's writes in the calling cell
+            called = set().union(*(body_writes[name] for name in reads if name in body_writes))
+            sets.append((reads, a.writes | ((a.receivers | called) - modules)))
+    deps = {}
+    for j, cell in enumerate(sets):
+        deps[j] = set()
+        for i in range(j):
+            earlier = sets[i]
+            if cell is None or earlier is None or earlier[1] & (cell[0] | cell[1]) or earlier[0] & cell[1]:
+                deps[j].add(i)
+    return deps
+
+
+# Seconds along the longest chain of dependencies: the floor on wall time with unlimited threads
+def critical_path(deps, durations):
+    finish = {}
+    for j in sorted(deps):
+        finish[j] = durations[j] + max((finish[i] for i in deps[j]), default=0)
+    return max(finish.values(), default=0)
+
+
+# Run fn(item) for each item as soon as the items it depends on (per build_dag) have finished; returns
+# results in order. After a failure nothing new starts; the first failing item (in notebook order) re-raises
+# once running ones finish.
+def run_dag(items, deps, fn, threads):
+    waiting_on = {j: set(d) for j, d in deps.items()}
+    dependents = {i: [j for j in deps if i in deps[j]] for i in deps}
+    results = [None] * len(items)
+    errors = []
+    ready = [j for j, d in waiting_on.items() if not d]
+    running = {}
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        while ready or running:
+            if not errors:
+                for j in sorted(ready):
+                    running[executor.submit(fn, items[j])] = j
+            ready = []
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = running.pop(future)
+                try:
+                    results[i] = future.result()
+                except BaseException as e:
+                    errors.append((i, e))
+                    continue
+                for j in dependents[i]:
+                    waiting_on[j].discard(i)
+                    if not waiting_on[j]:
+                        ready.append(j)
+    if errors:
+        raise min(errors, key=lambda error: error[0])[1]
+    return results
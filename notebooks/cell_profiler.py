@@ -0,0 +1,141 @@
+# notebooks/cell_profiler.py
+# Purpose: Per-cell profiling for notebooks - wall time, CPU time and peak Python memory per COMMAND cell,
+# written as a JSON report
+#
+# In an IPython kernel (Databricks, Jupyter) `enable()` hooks pre_run_cell / post_run_cell so every cell run
+# afterwards is measured without touching it; cells are named by their first comment line. Elsewhere, wrap
+# blocks in `with PROFILER.cell("name"):`. Peak memory comes from tracemalloc (Python allocations only) and
+# is the cell's peak above what was allocated when it started. Tracing slows every allocation in the process,
+# so the shared PROFILER only traces memory after `PROFILER.trace_memory = True`; disable() stops it again.
+#
+#   from cell_profiler import PROFILER
+#   PROFILER.enable()
+#   ...
+#   PROFILER.write("/dbfs/tmp/profile.json")
+
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+
+@dataclass
+class CellTiming:
+    name: str
+    wall: float
+    cpu: float
+    peak_memory_mb: float = None
+    ok: bool = True
+
+
+# A cell's name: its first comment line (skipping MAGIC lines), else "cell <n>"
+def cell_name(source, number):
+    for line in source.splitlines():
+        line = line.strip()
+        if line.startswith("# MAGIC"):
+            continue
+        if line.startswith("#"):
+            name = line.lstrip("# ").strip()
+            if name:
+                return name
+        elif line:
+            break
+    return f"cell {number}"
+
+
+class CellProfiler:
+    # For cells running concurrently, cpu_clock=time.thread_time keeps each cell's CPU time its own
+    def __init__(self, trace_memory=True, cpu_clock=time.process_time):
+        self.trace_memory = trace_memory
+        self.cpu_clock = cpu_clock
+        self.cells = []
+        # Per thread, so cells running concurrently on a thread pool are timed separately
+        self._local = threading.local()
+        self._shell = None
+
+    def start(self, name):
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0] if self.trace_memory else 0
+        self._local.started = (name, time.perf_counter(), self.cpu_clock(), baseline)
+
+    def stop(self, ok=True):
+        started = getattr(self._local, "started", None)
+        if started is None:
+            return None
+        name, wall, cpu, baseline = started
+        self._local.started = None
+        peak = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            peak = round((tracemalloc.get_traced_memory()[1] - baseline) / 2 ** 20, 3)
+        timing = CellTiming(name, round(time.perf_counter() - wall, 6), round(self.cpu_clock() - cpu, 6), peak, ok)
+        self.cells.append(timing)
+        return timing
+
+    @contextmanager
+    def cell(self, name):
+        self.start(name)
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.stop(ok)
+
+    def _pre_run_cell(self, info):
+        self.start(cell_name(info.raw_cell or "", len(self.cells) + 1))
+
+    def _post_run_cell(self, result):
+        self.stop(result.success)
+
+    # Hook into the running IPython kernel; returns False when there is none. A kernel has always imported
+    # IPython already, so plain Python never pays for looking it up.
+    def enable(self):
+        if "IPython" not in sys.modules:
+            return False
+        shell = sys.modules["IPython"].get_ipython()
+        if shell is None:
+            return False
+        if self._shell is None:
+            shell.events.register("pre_run_cell", self._pre_run_cell)
+            shell.events.register("post_run_cell", self._post_run_cell)
+            self._shell = shell
+        return True
+
+    def disable(self):
+        if self._shell is not None:
+            self._shell.events.unregister("pre_run_cell", self._pre_run_cell)
+            self._shell.events.unregister("post_run_cell", self._post_run_cell)
+            self._shell = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def report(self):
+        return {"total_wall": round(sum(c.wall for c in self.cells), 6),
+                "total_cpu": round(sum(c.cpu for c in self.cells), 6),
+                "cells": [asdict(c) for c in self.cells]}
+
+    # Write the JSON report atomically
+    def write(self, path):
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        os.replace(tmp, path)
+
+    # The `top` slowest cells by wall time, one line each
+    def summary(self, top=10):
+        lines = []
+        for c in sorted(self.cells, key=lambda c: c.wall, reverse=True)[:top]:
+            memory = "" if c.peak_memory_mb is None else f", peak {c.peak_memory_mb:.1f} MB"
+            lines.append(f"{c.wall:9.3f}s wall {c.cpu:9.3f}s cpu{memory}  {c.name}{'' if c.ok else ' (failed)'}")
+        return "\n".join(lines)
+
+
+# Shared profiler for the notebook session; memory tracing is opt-in
+PROFILER = CellProfiler(trace_memory=False)
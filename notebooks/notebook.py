@@ -1,51 +1,108 @@
 # Databricks notebook source
 # MAGIC %md
-# MAGIC # Databricks 5-Second Sleep Notebook
-# MAGIC 
-# MAGIC This notebook demonstrates a simple 5-second sleep operation in Databricks.
-# MAGIC It imports the time module and uses `time.sleep(5)` to pause execution for 5 seconds.
+# MAGIC # Databricks Wait-for-Readiness Notebook
+# MAGIC
+# MAGIC This notebook waits for upstream data to be ready before continuing, instead of sleeping for a fixed time.
+# MAGIC It polls a readiness condition (file arrival, a new Delta table version, or a marker row) with adaptive
+# MAGIC backoff and a deadline, using `wait_until` from `waiting.py` next to this notebook.
 
 # COMMAND ----------
 
 # MAGIC %md
 # MAGIC ## Import Required Libraries
-# MAGIC 
-# MAGIC Import the time module to use the sleep function.
+# MAGIC
+# MAGIC Import the wait utility and enable the cell profiler, which records wall time, CPU time and (with the
+# MAGIC `profile_memory` widget) peak memory for every cell run after this one.
 
 # COMMAND ----------
 
 # MAGIC %python
-# Import the time module
-import time
-print("Time module imported successfully!")
+# Import the wait utility and the cell profiler (Databricks puts the notebook's directory on sys.path)
+import os
+
+from cell_profiler import PROFILER
+from waiting import file_arrived, marker_row, table_version_changed, wait_until
+PROFILER.enable()
+print("Wait utility imported successfully!")
 
 # COMMAND ----------
 
 # MAGIC %md
-# MAGIC ## Sleep for 5 Seconds
-# MAGIC 
-# MAGIC Use `time.sleep(5)` to pause execution for 5 seconds. This is useful for:
-# MAGIC - Testing long-running processes
-# MAGIC - Adding delays between operations
-# MAGIC - Simulating processing time in demonstrations
+# MAGIC ## Wait for Readiness
+# MAGIC
+# MAGIC Set one of these widgets (or the matching upper-case environment variable when run outside Databricks):
+# MAGIC - `wait_for_path`: a file or glob that must exist, e.g. `/dbfs/landing/2024-06-01/_SUCCESS`
+# MAGIC - `wait_for_table`: a Delta table that must get a new version
+# MAGIC - `wait_for_query`: a SQL query that must return a row, e.g. a control-table marker
+# MAGIC
+# MAGIC `wait_timeout` is the deadline in seconds. The wait ends within one poll interval of the condition
+# MAGIC becoming true, and fails the run at the deadline. With nothing set, the notebook continues immediately.
+
+# COMMAND ----------
+
+# MAGIC %python
+# Read the readiness parameters from widgets, or from the environment outside Databricks
+def parameter(name, default=""):
+    try:
+        dbutils.widgets.text(name, default)  # noqa: F821
+        return dbutils.widgets.get(name)  # noqa: F821
+    except NameError:
+        return os.environ.get(name.upper(), default)
+
+
+wait_for_path = parameter("wait_for_path")
+wait_for_table = parameter("wait_for_table")
+wait_for_query = parameter("wait_for_query")
+wait_timeout = float(parameter("wait_timeout", "600"))
+profile_report = parameter("profile_report")
+# Peak memory per cell costs tracemalloc overhead on every allocation until the report cell stops it
+if parameter("profile_memory", "false").lower() == "true":
+    PROFILER.trace_memory = True
 
 # COMMAND ----------
 
 # MAGIC %python
-# Sleep for 5 seconds
-print("Starting 5-second sleep...")
-print(f"Start time: {time.strftime('%H:%M:%S')}")
+# Wait until the configured condition holds
+if wait_for_path:
+    condition = file_arrived(wait_for_path)
+elif wait_for_table:
+    condition = table_version_changed(spark, wait_for_table)  # noqa: F821
+elif wait_for_query:
+    condition = marker_row(spark, wait_for_query)  # noqa: F821
+else:
+    condition = None
 
-# Sleep for 5 seconds
-time.sleep(5)
+if condition is None:
+    print("No readiness condition configured; nothing to wait for.")
+else:
+    print(f"Waiting up to {wait_timeout:.0f}s for {condition.description}...")
+    result = wait_until(condition, timeout=wait_timeout)
+    print(f"Ready after {result.waited:.1f}s ({result.polls} polls): {result.value}")
 
-print(f"End time: {time.strftime('%H:%M:%S')}")
-print("Sleep completed!")
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Cell Profile
+# MAGIC
+# MAGIC Print the slowest cells and, when the `profile_report` widget is set, write the per-cell JSON report there.
+# MAGIC Peak memory is included when the `profile_memory` widget is `true`. Profiling ends with this cell.
+
+# COMMAND ----------
+
+# MAGIC %python
+# Report per-cell timings
+print(PROFILER.summary())
+if profile_report:
+    PROFILER.write(profile_report)
+    print(f"Cell profile written to {profile_report}")
+# Unhook the profiler and stop tracemalloc so later commands in this session run at full speed
+PROFILER.disable()
 
 # COMMAND ----------
 
 # MAGIC %md
 # MAGIC ## Additional Information
-# MAGIC 
-# MAGIC This notebook can be imported directly into Databricks workspace.
-# MAGIC The sleep operation will pause the execution for exactly 5 seconds.
+# MAGIC
+# MAGIC This notebook can be imported directly into Databricks workspace together with `waiting.py` and
+# MAGIC `cell_profiler.py`.
+# MAGIC Cluster idle time is the actual wait for upstream data plus at most one poll interval (capped at 30 seconds).
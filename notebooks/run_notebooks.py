@@ -0,0 +1,256 @@
+# notebooks/run_notebooks.py
+# Purpose: Run Databricks source-format notebooks locally - one process per notebook, per-cell timings
+#
+# Parses the exported source format ("# Databricks notebook source" header, "# COMMAND ----------" cell
+# separators, "# MAGIC %md" / "%python" / "%sql" cells), executes the Python cells of each notebook in one
+# shared namespace from the notebook's directory, skips markdown and other languages, and follows
+# "%run ./other" into the same namespace. `spark` and `dbutils` are not defined, so notebooks that need
+# them should guard with NameError as notebook.py does. Notebooks run in parallel, each in a fresh process.
+# With --cell-threads N, cells within a notebook run concurrently as their name dependencies allow
+# (cell_dag.py), so I/O-bound notebooks finish in about their critical-path time.
+# Parsed, compiled cells are cached on disk by content hash (cell_cache.py), so unchanged notebooks start
+# without re-parsing or recompiling.
+#
+# Usage:
+#   python notebooks/run_notebooks.py notebooks
+#   python notebooks/run_notebooks.py notebooks/notebook.py --param wait_timeout=30 --report notebook-run.json
+#   python notebooks/run_notebooks.py notebooks --no-cache
+#   python notebooks/run_notebooks.py notebooks --cell-threads 8
+
+import argparse
+import io
+import json
+import linecache
+import os
+import re
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stderr, redirect_stdout
+from dataclasses import asdict, dataclass, field
+
+from cell_cache import DEFAULT_CACHE_DIR, CellCache
+from cell_dag import build_dag, critical_path, run_dag
+from cell_profiler import PROFILER, cell_name
+
+HEADER = "# Databricks notebook source"
+SEPARATOR = "# COMMAND ----------"
+MAGIC = "# MAGIC"
+# Code objects of cells are compiled as "<notebook path>:cell<n>"
+CELL_FILENAME = re.compile(r":cell\d+$")
+# Cells naming the runner's profiler see the timings of every other cell, which the name DAG cannot know
+PROFILER_REFERENCE = re.compile(r"\bPROFILER\b")
+
+
+@dataclass
+class Cell:
+    index: int
+    language: str
+    source: str
+    code: object = None
+
+
+@dataclass
+class NotebookRun:
+    path: str
+    ok: bool
+    wall: float
+    cells: list = field(default_factory=list)
+    skipped: int = 0
+    error: str = None
+    output: str = ""
+    cached: bool = False
+    critical_path: float = None
+
+
+def is_notebook(path):
+    with open(path) as f:
+        return f.readline().strip() == HEADER
+
+
+# Notebook paths under the given files / directories, sorted
+def discover(paths):
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.endswith(".py") and is_notebook(os.path.join(path, name)))
+        else:
+            found.append(path)
+    return found
+
+
+# Cells of a source-format notebook. A cell whose first line is "# MAGIC %<language>" is in that language;
+# for a %python cell the remaining lines are plain code, for the others the "# MAGIC " prefixes are stripped.
+def parse(text):
+    lines = text.splitlines()
+    if not lines or lines[0].strip() != HEADER:
+        raise ValueError(f"Not a Databricks source notebook (first line is not {HEADER!r}).")
+    blocks, current = [], []
+    for line in lines[1:]:
+        if line.strip() == SEPARATOR:
+            blocks.append(current)
+            current = []
+        else:
+            current.append(line)
+    blocks.append(current)
+
+    cells = []
+    for block in blocks:
+        body = list(block)
+        while body and not body[0].strip():
+            body.pop(0)
+        if not body:
+            continue
+        language = "python"
+        if body[0].startswith(f"{MAGIC} %"):
+            magic = body[0][len(MAGIC) + 1:].strip()
+            language = magic[1:].split()[0]
+            if language == "python":
+                body = body[1:]
+            else:
+                body = [magic] + body[1:]
+                body = [line[len(MAGIC) + 1:] if line.startswith(MAGIC) else line for line in body]
+        cells.append(Cell(len(cells) + 1, language, "\n".join(body).strip("\n") + "\n"))
+    return cells
+
+
+# Parsed cells of the notebook at `path` with their code objects compiled, from `cache` when the notebook is
+# unchanged; returns (cells, cache hit)
+def load(path, cache=None):
+    with open(path) as f:
+        text = f.read()
+    cached = cache.get(path, text) if cache else None
+    if cached is not None:
+        return [Cell(*fields) for fields in cached], True
+    cells = parse(text)
+    for cell in cells:
+        if cell.language == "python":
+            cell.code = compile(cell.source, f"{path}:cell{cell.index}", "exec")
+    if cache:
+        cache.put(path, text, [(cell.index, cell.language, cell.source, cell.code) for cell in cells])
+    return cells, False
+
+
+# Execute the notebook's Python cells in `namespace`, timing each through `profiler`; %run cells execute the
+# referenced notebook (path relative to this one, ".py" optional) in the same namespace. With threads > 1
+# cells run on a thread pool in dependency order; %run cells and cells using PROFILER are barriers.
+# Returns (non-Python cells skipped, seconds).
+def execute(path, namespace, profiler, cell_name, cache=None, threads=0):
+    cells, _ = load(path, cache)
+    steps = [cell for cell in cells if cell.language in ("python", "run")]
+
+    def run(cell):
+        started = time.perf_counter()
+        if cell.language == "run":
+            target = cell.source.split()[1]
+            target = os.path.normpath(os.path.join(os.path.dirname(path), target))
+            if not target.endswith(".py"):
+                target += ".py"
+            return execute(target, namespace, profiler, cell_name, cache, threads)[0], time.perf_counter() - started
+        # Register the cell source so tracebacks show its lines
+        filename = cell.code.co_filename
+        linecache.cache[filename] = (len(cell.source), None, cell.source.splitlines(True), filename)
+        with profiler.cell(f"{os.path.basename(path)} #{cell.index}: {cell_name(cell.source, cell.index)}"):
+            exec(cell.code, namespace)
+        return 0, time.perf_counter() - started
+
+    skipped = len(cells) - len(steps)
+    if threads > 1:
+        deps = build_dag([cell.source if cell.language == "python" and not PROFILER_REFERENCE.search(cell.source)
+                          else None for cell in steps])
+        results = run_dag(steps, deps, run, threads)
+        return skipped + sum(r[0] for r in results), critical_path(deps, [r[1] for r in results])
+    results = [run(cell) for cell in steps]
+    return skipped + sum(r[0] for r in results), sum(r[1] for r in results)
+
+
+# Run one notebook in this (fresh) process; params are exported as upper-case environment variables, the
+# way notebook widgets fall back outside Databricks
+def run_notebook(path, params=None, cache_dir=None, cell_threads=0):
+    path = os.path.abspath(path)
+    cache = CellCache(cache_dir) if cache_dir else None
+    # The process ends with the notebook, so tracing memory costs nothing afterwards; tracemalloc peaks are
+    # process-wide though, meaningless for overlapping cells
+    PROFILER.trace_memory = cell_threads <= 1
+    if cell_threads > 1:
+        PROFILER.cpu_clock = time.thread_time
+    sys.path.insert(0, os.path.dirname(path))
+    os.chdir(os.path.dirname(path))
+    os.environ.update({name.upper(): value for name, value in (params or {}).items()})
+
+    namespace = {"__name__": "__main__", "__file__": path}
+    output = io.StringIO()
+    started = time.perf_counter()
+    skipped, critical, error = 0, None, None
+    try:
+        with redirect_stdout(output), redirect_stderr(output):
+            skipped, critical = execute(path, namespace, PROFILER, cell_name, cache, cell_threads)
+    except BaseException as e:
+        # From the first notebook cell frame on, leaving out the runner and thread pool
+        frames = traceback.extract_tb(e.__traceback__)
+        cell_frames = [i for i, frame in enumerate(frames) if CELL_FILENAME.search(frame.filename)]
+        frames = frames[cell_frames[0]:] if cell_frames else frames
+        error = "".join(["Traceback (most recent call last):\n"] + traceback.format_list(frames)
+                        + traceback.format_exception_only(e))
+    return NotebookRun(path, error is None, round(time.perf_counter() - started, 6),
+                       [asdict(c) for c in PROFILER.cells], skipped, error, output.getvalue(),
+                       bool(cache and cache.hits and not cache.misses),
+                       None if cell_threads <= 1 or critical is None else round(critical, 6))
+
+
+def run_all(paths, params=None, processes=None, cache_dir=DEFAULT_CACHE_DIR, cell_threads=0):
+    processes = max(1, min(processes or os.cpu_count() or 1, len(paths)))
+    cache_dir = cache_dir and os.path.abspath(cache_dir)
+    with ProcessPoolExecutor(max_workers=processes, max_tasks_per_child=1) as executor:
+        return list(executor.map(run_notebook, paths, [params] * len(paths), [cache_dir] * len(paths),
+                                 [cell_threads] * len(paths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Databricks source-format notebooks locally.")
+    parser.add_argument("paths", nargs="+", help="Notebook files or directories of notebooks")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=VALUE",
+                        help="Widget value, exported as the upper-cased environment variable")
+    parser.add_argument("--processes", type=int, default=None, help="Parallel notebook processes (default: CPUs)")
+    parser.add_argument("--report", default=None, help="Write per-notebook, per-cell timings as JSON here")
+    parser.add_argument("--show-output", action="store_true", help="Print notebook output even when they pass")
+    parser.add_argument("--cache-dir", default=os.environ.get("NOTEBOOK_CACHE_DIR", DEFAULT_CACHE_DIR),
+                        help="Compiled-cell cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="Parse and compile every notebook from scratch")
+    parser.add_argument("--cell-threads", type=int, default=0,
+                        help="Run independent cells concurrently on this many threads (default: in order)")
+    args = parser.parse_args()
+
+    params = dict(param.split("=", 1) for param in args.param)
+    paths = discover(args.paths)
+    if not paths:
+        print("No notebooks found.")
+        sys.exit(1)
+    started = time.perf_counter()
+    runs = run_all(paths, params, args.processes, None if args.no_cache else args.cache_dir, args.cell_threads)
+    wall = time.perf_counter() - started
+
+    for run in runs:
+        print(f"{'PASS' if run.ok else 'FAIL'} {os.path.relpath(run.path)}: {len(run.cells)} cells in {run.wall:.3f}s"
+              f"{'' if run.critical_path is None else f' (critical path {run.critical_path:.3f}s)'}"
+              f"{f', {run.skipped} non-Python cells skipped' if run.skipped else ''}")
+        for cell in sorted(run.cells, key=lambda c: c["wall"], reverse=True):
+            print(f"    {cell['wall']:9.3f}s wall {cell['cpu']:9.3f}s cpu  {cell['name']}")
+        if run.output and (args.show_output or not run.ok):
+            print("    " + run.output.rstrip().replace("\n", "\n    "))
+        if run.error:
+            print("    " + run.error.rstrip().replace("\n", "\n    "))
+    failed = sum(not run.ok for run in runs)
+    print(f"{len(runs) - failed}/{len(runs)} notebooks passed in {wall:.2f}s"
+          f"{'' if args.no_cache else f', {sum(run.cached for run in runs)} from the compiled-cell cache'}")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({"wall_seconds": round(wall, 6), "notebooks": [asdict(run) for run in runs]}, f, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
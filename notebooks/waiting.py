@@ -0,0 +1,142 @@
+# notebooks/waiting.py
+# Purpose: Event-driven wait primitive for notebooks - poll a readiness condition with adaptive backoff and a deadline
+#
+# Replaces fixed sleeps used to wait for upstream data: the wait ends within one poll interval of the
+# condition becoming true, and fails loudly at the deadline instead of carrying on with missing data.
+#
+#   from waiting import wait_until, file_arrived, table_version_changed, marker_row
+#   wait_until(table_version_changed(spark, "main.silver.orders"), timeout=1800)
+
+import glob
+import time
+from dataclasses import dataclass
+
+DEFAULT_TIMEOUT = 600.0
+DEFAULT_INITIAL_INTERVAL = 0.5
+DEFAULT_MAX_INTERVAL = 30.0
+DEFAULT_BACKOFF = 1.5
+# Error text of a query against a table that does not exist (yet), across Spark, Databricks SQL and DB-API drivers
+MISSING_TABLE_MARKERS = ("TABLE_OR_VIEW_NOT_FOUND", "table or view not found", "does not exist", "no such table")
+
+
+class WaitTimeout(TimeoutError):
+    pass
+
+
+@dataclass
+class WaitResult:
+    value: object
+    waited: float
+    polls: int
+
+
+# Poll `condition()` until it returns a value other than None or False, which is returned in the WaitResult
+# (so a new table's Delta version 0 counts as ready). Intervals grow from `initial` by `backoff` up to
+# `max_interval`, so early readiness is seen quickly while long waits stay cheap; no sleep extends past the
+# deadline. A condition that raises counts as not ready (the upstream table may not exist yet, or a query hit
+# a transient error); the last error is reported in the WaitTimeout raised when the deadline passes.
+def wait_until(condition, timeout=DEFAULT_TIMEOUT, initial=DEFAULT_INITIAL_INTERVAL,
+               max_interval=DEFAULT_MAX_INTERVAL, backoff=DEFAULT_BACKOFF, description=None,
+               sleep=time.sleep, clock=time.monotonic):
+    started = clock()
+    deadline = started + timeout
+    interval = initial
+    polls = 0
+    error = None
+    while True:
+        polls += 1
+        try:
+            value = condition()
+        except Exception as e:
+            value, error = None, e
+        now = clock()
+        if value is not None and value is not False:
+            return WaitResult(value, now - started, polls)
+        if now >= deadline:
+            what = description or getattr(condition, "description", "condition")
+            last = f" Last error: {type(error).__name__}: {error}" if error is not None else ""
+            raise WaitTimeout(f"Timed out after {now - started:.1f}s ({polls} polls) waiting for {what}.{last}")
+        sleep(min(interval, deadline - now))
+        interval = min(max_interval, interval * backoff)
+
+
+# Query runner over a SparkSession (spark.sql) or a DB-API connection; returns a list of row tuples
+def sql_runner(session):
+    if hasattr(session, "sql"):
+        return lambda query: [tuple(row) for row in session.sql(query).collect()]
+
+    def run(query):
+        cursor = session.cursor()
+        try:
+            cursor.execute(query)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+    return run
+
+
+def _named(condition, description):
+    condition.description = description
+    return condition
+
+
+# Ready when files matching `pattern` (a path or glob, e.g. /dbfs/landing/2024-06-01/_SUCCESS) exist;
+# the value is the sorted list of matches. With min_count, waits for at least that many files.
+def file_arrived(pattern, min_count=1):
+    def condition():
+        matches = sorted(glob.glob(pattern))
+        return matches if len(matches) >= min_count else None
+    return _named(condition, f"files matching {pattern}")
+
+
+def is_missing_table(error):
+    text = str(error).lower()
+    return any(marker.lower() in text for marker in MISSING_TABLE_MARKERS)
+
+
+# Ready when the Delta table's latest version is newer than `since` (default: the version when the
+# condition is created); the value is the new version. A table that does not exist yet has no baseline, so
+# its first version counts as new. If the baseline query fails otherwise, the baseline is taken on a later poll.
+def table_version_changed(session, table_name, since=None):
+    run = sql_runner(session)
+    baseline, known = since, since is not None
+
+    def latest():
+        rows = run(f"DESCRIBE HISTORY {table_name} LIMIT 1")
+        return rows[0][0] if rows else None
+
+    def establish():
+        nonlocal baseline, known
+        try:
+            baseline = latest()
+        except Exception as e:
+            if not is_missing_table(e):
+                raise
+            baseline = None
+        known = True
+
+    if not known:
+        try:
+            establish()
+        except Exception:
+            pass
+
+    def condition():
+        if not known:
+            establish()
+            return None
+        version = latest()
+        return version if version is not None and (baseline is None or version > baseline) else None
+    after = f" (after {baseline})" if known and baseline is not None else ""
+    return _named(condition, f"a new version of {table_name}{after}")
+
+
+# Ready when `query` returns at least one row, e.g. a control-table marker written by the upstream job;
+# the value is the first row
+def marker_row(session, query):
+    run = sql_runner(session)
+
+    def condition():
+        rows = run(query)
+        return rows[0] if rows else None
+    return _named(condition, f"a row from: {query}")
@@ -0,0 +1,106 @@
+# smoketest/arrow_eval.py
+# Purpose: Arrow-native evaluation of batched metric results - columnar decode and vectorized rule comparisons
+#
+# A batch result is one row per table and one typed column per metric slot and kind (see planner.Batch). Instead
+# of decoding each cell in Python, every rule type gathers its inputs for all tables with a single take() over
+# the flattened columns of that kind, decodes them once, and compares observed values against bound arrays.
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = pc = None
+
+from checks import CheckResult
+from rules import ROW_COUNT
+
+
+def available():
+    return pa is not None
+
+
+# Numbers as float64; timestamps, typed or as text, as naive UTC timestamp[us] (zone-aware values keep
+# their instant, zone-less ones are taken as UTC like rules.decode does)
+def decode_array(array, kind):
+    if kind != "timestamp":
+        return pc.cast(array, pa.float64())
+    if pa.types.is_string(array.type) or pa.types.is_large_string(array.type):
+        try:
+            return pc.cast(array, pa.timestamp("us"))
+        except pa.ArrowInvalid:
+            # Zone-offset text such as DuckDB's TIMESTAMPTZ "2024-01-01 00:00:00+00"
+            array = pc.cast(array, pa.timestamp("us", tz="UTC"))
+    return pc.cast(array, pa.timestamp("us"), safe=False)
+
+
+# Vectorized min/max judgement; missing bounds always pass, missing observations always fail
+def judge(observed, rules):
+    mins = pa.array([rule.min for rule in rules], pa.float64())
+    maxs = pa.array([rule.max for rule in rules], pa.float64())
+    within = pc.and_kleene(
+        pc.or_kleene(pc.is_null(mins), pc.greater_equal(observed, mins)),
+        pc.or_kleene(pc.is_null(maxs), pc.less_equal(observed, maxs))
+    )
+    return pc.fill_null(pc.and_kleene(within, pc.is_valid(observed)), False)
+
+
+# Evaluate every plan of a batch from its Arrow result table
+def evaluate_batch(batch, table, elapsed=0.0, connection=None):
+    position = {int(index): row for row, index in enumerate(table.column(0).to_pylist())}
+    # Result columns flattened per column kind; typed columns are decoded before, string columns after take()
+    flats, offsets = {}, {}
+    for column, (_, kind) in enumerate(batch.columns):
+        array = table.column(column + 1).combine_chunks()
+        array = pc.cast(array, pa.string()) if kind == "string" else decode_array(array, kind)
+        offsets[column] = sum(len(a) for a in flats.get(kind, []))
+        flats.setdefault(kind, []).append(array)
+    flats = {kind: pa.concat_arrays(arrays) for kind, arrays in flats.items()}
+
+    # cells are (plan index, metric position) pairs, all of metrics of `kind`
+    def gather(cells, kind):
+        if not cells:
+            return pa.array([], pa.timestamp("us") if kind == "timestamp" else pa.float64())
+        columns = [batch.positions[i][slot] for i, slot in cells]
+        group = batch.columns[columns[0]][1]
+        indices = pa.array([offsets[column] + position[i] for (i, _), column in zip(cells, columns)], pa.int64())
+        values = flats[group].take(indices)
+        return decode_array(values, kind) if group == "string" else values
+
+    present = [(i, plan) for i, plan in enumerate(batch.plans) if i in position]
+
+    # Row counts for every plan in one gather
+    counted = [(i, plan) for i, plan in present if ROW_COUNT in plan.metrics]
+    counts = gather([(i, plan.metrics.index(ROW_COUNT)) for i, plan in counted], "number").to_pylist()
+    rows = {i: int(count) if count is not None else None for (i, _), count in zip(counted, counts)}
+
+    # Group (plan, rule) pairs by rule type so each type is observed and judged once
+    groups = {}
+    for i, plan in present:
+        if plan.plain:
+            continue
+        for r, (rule, slots) in enumerate(zip(plan.rules, plan.slots)):
+            groups.setdefault(type(rule), []).append((i, r, rule, slots))
+
+    rule_results = {}
+    for members in groups.values():
+        first_plan = batch.plans[members[0][0]]
+        kinds = [first_plan.metrics[slot].kind for slot in members[0][3]]
+        values = [
+            gather([(i, slots[k]) for i, _, _, slots in members], kinds[k])
+            for k in range(len(kinds))
+        ]
+        rules = [rule for _, _, rule, _ in members]
+        observed = rules[0].observe_arrow(pc, values)
+        passed = judge(observed, rules)
+        for (i, r, rule, _), obs, ok in zip(members, observed.to_pylist(), passed.to_pylist()):
+            rule_results[(i, r)] = rule.result(obs, ok)
+
+    results = []
+    for i, plan in enumerate(batch.plans):
+        if i not in position:
+            results.append(CheckResult(plan.table, False, "Smoke test failed: no result row returned.",
+                                       elapsed=elapsed))
+            continue
+        plan_results = None if plan.plain else [rule_results[(i, r)] for r in range(len(plan.rules))]
+        results.append(plan.summarize(rows.get(i), plan_results, elapsed, connection))
+    return results
@@ -0,0 +1,168 @@
+# smoketest/async_runner.py
+# Purpose: Asyncio smoke test runner - overlaps blocking DB-API checks with per-check and global deadlines
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from checks import CheckResult
+
+DEFAULT_CHECK_TIMEOUT = 300.0
+DEFAULT_TOTAL_TIMEOUT = 1800.0
+CANCEL_GRACE = 5.0
+
+
+# Connection proxy that remembers open cursors so a timed-out check can be cancelled from another thread
+class CancellableConnection:
+    def __init__(self, connection):
+        self._connection = connection
+        self._cursors = []
+        self._lock = threading.Lock()
+        self.cancelled = False
+
+    def cursor(self):
+        cursor = self._connection.cursor()
+        with self._lock:
+            self._cursors.append(cursor)
+        return cursor
+
+    # Best effort: Databricks cursors support cancel(), sqlite3/duckdb connections support interrupt()
+    def cancel(self):
+        self.cancelled = True
+        with self._lock:
+            cursors = list(self._cursors)
+        for cursor in cursors:
+            if hasattr(cursor, "cancel"):
+                try:
+                    cursor.cancel()
+                except Exception:
+                    pass
+        if hasattr(self._connection, "interrupt"):
+            try:
+                self._connection.interrupt()
+            except Exception:
+                pass
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+# Outcome of an async run; stragglers are tables/batches whose worker thread is still blocked after cancellation
+class AsyncRun:
+    def __init__(self, results, inflight):
+        self.results = results
+        self._inflight = inflight
+
+    @property
+    def timed_out(self):
+        return [r.table for r in self.results if r.timed_out]
+
+    @property
+    def stragglers(self):
+        return sorted(self._inflight)
+
+
+# Checks run per item: a table name, or a batch exposing the `tables` it covers
+def _failed(item, message, **kwargs):
+    return [CheckResult(table_name, False, message, **kwargs) for table_name in getattr(item, "tables", [item])]
+
+
+def _as_list(result):
+    return result if isinstance(result, list) else [result]
+
+
+async def _check(loop, executor, semaphore, pool, item, check, check_timeout, started, inflight, reconnects):
+    handle = {}
+
+    def blocking():
+        if handle.get("abandoned"):
+            return None
+        inflight.add(str(item))
+        try:
+            # A check whose connection lost its session is re-run on a fresh one
+            for attempt in range(reconnects + 1):
+                connection = CancellableConnection(pool.acquire())
+                handle["connection"] = connection
+                if handle.get("abandoned"):
+                    pool.release(connection._connection)
+                    return None
+                try:
+                    result = check(connection, item)
+                finally:
+                    # A cancelled session may be mid-statement; never hand it to another check
+                    pool.release(connection._connection, discard=connection.cancelled)
+                if not getattr(connection, "broken", False) or connection.cancelled:
+                    break
+            return result
+        finally:
+            inflight.discard(str(item))
+
+    def abandon():
+        handle["abandoned"] = True
+        if "connection" in handle:
+            handle["connection"].cancel()
+
+    async with semaphore:
+        started.add(str(item))
+        future = loop.run_in_executor(executor, blocking)
+        try:
+            result = await asyncio.wait_for(future, check_timeout)
+        except asyncio.TimeoutError:
+            abandon()
+            return _failed(item, f"Smoke test timed out after {check_timeout:g}s.",
+                           elapsed=check_timeout, timed_out=True)
+        except asyncio.CancelledError:
+            abandon()
+            raise
+    if result is None:
+        return _failed(item, "Smoke test cancelled.", timed_out=True)
+    return _as_list(result)
+
+
+async def _run(items, pool, check, concurrency, check_timeout, total_timeout, executor, inflight, reconnects):
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    started = set()
+    tasks = [
+        (item, asyncio.create_task(
+            _check(loop, executor, semaphore, pool, item, check, check_timeout, started, inflight, reconnects)))
+        for item in items
+    ]
+    done, pending = await asyncio.wait([task for _, task in tasks], timeout=total_timeout)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+    results = []
+    for item, task in tasks:
+        if task in done and task.exception() is None:
+            results.extend(task.result())
+        elif task in done:
+            results.extend(_failed(item, f"Smoke test failed: {task.exception()}"))
+        elif str(item) in started:
+            results.extend(_failed(item, f"Smoke test cancelled at the {total_timeout:g}s global deadline.",
+                                   timed_out=True))
+        else:
+            results.extend(_failed(item, f"Smoke test not started before the {total_timeout:g}s global deadline.",
+                                   timed_out=True))
+    return results
+
+
+# Run check(connection, item) for every table or batch with at most `concurrency` in flight;
+# timeouts are in seconds, None disables them; `reconnects` re-runs on a fresh connection after a lost session
+def run_checks_async(items, pool, concurrency, check,
+                     check_timeout=DEFAULT_CHECK_TIMEOUT, total_timeout=DEFAULT_TOTAL_TIMEOUT, reconnects=0):
+    concurrency = max(1, min(concurrency, len(items)))
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="smoke-check")
+    inflight = set()
+    try:
+        results = asyncio.run(
+            _run(items, pool, check, concurrency, check_timeout, total_timeout, executor, inflight, reconnects))
+    finally:
+        # Give cancelled statements a moment to unwind, but never wait on threads that stay stuck
+        grace_deadline = time.monotonic() + CANCEL_GRACE
+        while inflight and time.monotonic() < grace_deadline:
+            time.sleep(0.05)
+        executor.shutdown(wait=False, cancel_futures=True)
+    return AsyncRun(results, inflight)
@@ -0,0 +1,362 @@
+# smoketest/backends.py
+# Purpose: SQL backends for the smoke test - Databricks SQL warehouses plus local SQLite/DuckDB stand-ins
+
+import os
+import random
+import threading
+import time
+
+from hll import hash64
+from partitions import sql_literal
+
+DEFAULT_BACKEND = "databricks"
+# Row and key hashes are reduced below 2^31 so that SUMs over billions of rows stay within BIGINT
+HASH_MODULUS = 2147483647
+
+
+# Base backend: knows which settings it needs and how to open a DB-API connection
+class Backend:
+    name = None
+    required_settings = ()
+    string_type = "STRING"
+    # SQL types of batched metric columns per Metric.kind on the Arrow path; None when there is no Arrow path
+    column_types = {"number": "DOUBLE", "timestamp": "TIMESTAMP"}
+    # Column metadata source for schema fingerprints
+    information_schema = "information_schema"
+    type_column = "data_type"
+    current_catalog = "current_database()"
+    # Relative standard error of the engine's approx_count_distinct
+    approx_distinct_error = 0.05
+
+    def __init__(self, env=None):
+        self.env = os.environ if env is None else env
+
+    def setting(self, key, default=None):
+        return self.env.get(key, default)
+
+    def missing_settings(self):
+        return [key for key in self.required_settings if not self.env.get(key)]
+
+    def connect(self):
+        raise NotImplementedError
+
+    # Same backend pointed at another bundle target (dev/qa/prod): each setting may be overridden by a
+    # target-suffixed variable, e.g. DATABRICKS_HOST_PROD for DATABRICKS_HOST_DEV or SMOKE_TEST_DATABASE_QA
+    def for_target(self, target):
+        suffix = f"_{target.upper()}"
+        env = dict(self.env)
+        for key in self.required_settings:
+            base = key[:-len("_DEV")] if key.endswith("_DEV") else key
+            if self.env.get(base + suffix):
+                env[key] = self.env[base + suffix]
+        return type(self)(env)
+
+    # Non-negative hash of a row's columns, below HASH_MODULUS; only comparable within one engine
+    def row_hash(self, columns):
+        return f"pmod(xxhash64({', '.join(columns)}), {HASH_MODULUS})"
+
+    # COUNT(DISTINCT ...) over a possibly composite key, ignoring keys with a NULL part
+    def count_distinct(self, columns):
+        return f"COUNT(DISTINCT {', '.join(columns)})"
+
+    def non_null(self, columns):
+        return " AND ".join(f"{c} IS NOT NULL" for c in columns)
+
+    # FROM clause reading roughly `percent` % of the table, or at most `rows` rows when given
+    def sample_source(self, table_name, percent, rows=None, key=None):
+        if rows:
+            return f"{table_name} TABLESAMPLE ({int(rows)} ROWS)"
+        return f"{table_name} TABLESAMPLE ({percent:g} PERCENT)"
+
+    # Engine-side approximate distinct count expression, or None to sketch client-side
+    def approx_distinct(self, column):
+        return f"approx_count_distinct({column})"
+
+    # Deterministic hashed-key sample for engines without block sampling: rows whose hash falls below the
+    # percent threshold, or like TABLESAMPLE (n ROWS) the `rows` rows with the lowest hashes
+    def _hashed_sample(self, table_name, percent, rows, hash_expr):
+        if rows:
+            return f"(SELECT * FROM {table_name} ORDER BY {hash_expr} % 1000000 LIMIT {int(rows)}) sample"
+        threshold = int(percent * 10000)
+        return f"(SELECT * FROM {table_name} WHERE {hash_expr} % 1000000 < {threshold}) sample"
+
+    # Declared partition columns, in partition order; local engines have none and need a configured column
+    def partition_columns(self, cursor, table_name):
+        return []
+
+    # Newest `latest` distinct values of a partition column
+    def partition_values(self, cursor, table_name, column, latest):
+        cursor.execute(f"SELECT DISTINCT {column} FROM {table_name} WHERE {column} IS NOT NULL "
+                       f"ORDER BY {column} DESC LIMIT {int(latest)}")
+        return [row[0] for row in cursor.fetchall()]
+
+    # {requested table name: [(column, type)] in ordinal order} for all `tables` from one metadata query;
+    # tables that do not exist are absent. Unqualified names resolve against the current catalog/schema.
+    def fetch_schemas(self, cursor, tables):
+        names = sorted({name.split(".")[-1].lower() for name in tables})
+        cursor.execute(
+            f"SELECT table_catalog, table_schema, table_name, column_name, {self.type_column}, "
+            f"{self.current_catalog}, current_schema() "
+            f"FROM {self.information_schema}.columns "
+            f"WHERE lower(table_name) IN ({', '.join(sql_literal(n) for n in names)}) "
+            f"ORDER BY table_catalog, table_schema, table_name, ordinal_position"
+        )
+        schemas = {}
+        for catalog, schema, table, column, data_type, current_catalog, current_schema in cursor.fetchall():
+            for name in tables:
+                parts = [p.lower() for p in name.split(".")]
+                parts = [str(current_catalog).lower(), str(current_schema).lower()][:3 - len(parts)] + parts
+                if parts == [str(catalog).lower(), str(schema).lower(), str(table).lower()]:
+                    schemas.setdefault(name, []).append((column, str(data_type)))
+        return schemas
+
+    # Named bind parameter marker; execute() then takes a {name: value} dict
+    def placeholder(self, name):
+        return f":{name}"
+
+    # Whole result set as a pyarrow Table, or None when the driver has no Arrow fetch
+    def fetch_arrow(self, cursor):
+        return cursor.fetchall_arrow()
+
+    # Opaque token that changes whenever the table's data may have changed, or None if unknown
+    def table_version(self, cursor, table_name):
+        return None
+
+    # Local engines have no per-table version; any write to the database file (or its WAL) changes it
+    def _file_version(self, *suffixes):
+        path = self.setting("SMOKE_TEST_DATABASE")
+        parts = []
+        for candidate in [path] + [path + suffix for suffix in suffixes]:
+            if os.path.exists(candidate):
+                stat = os.stat(candidate)
+                parts.append(f"{stat.st_mtime_ns}:{stat.st_size}")
+        return "/".join(parts) or None
+
+
+# Databricks SQL warehouse via databricks-sql-connector
+class DatabricksBackend(Backend):
+    name = "databricks"
+    required_settings = ("DATABRICKS_HOST_DEV", "DATABRICKS_SQL_HTTP_PATH", "DATABRICKS_TOKEN")
+    # Unity Catalog's system-wide view spans every catalog; full_data_type keeps precision and nested types
+    information_schema = "system.information_schema"
+    type_column = "full_data_type"
+    current_catalog = "current_catalog()"
+
+    def connect(self):
+        from databricks import sql
+        return sql.connect(
+            server_hostname=self.setting("DATABRICKS_HOST_DEV"),
+            http_path=self.setting("DATABRICKS_SQL_HTTP_PATH"),
+            access_token=self.setting("DATABRICKS_TOKEN")
+        )
+
+    def partition_columns(self, cursor, table_name):
+        cursor.execute(f"DESCRIBE DETAIL {table_name}")
+        row = cursor.fetchone()
+        if row is None:
+            return []
+        detail = dict(zip([d[0] for d in cursor.description], row))
+        return list(detail.get("partitionColumns") or [])
+
+    # Partition values come from the metastore listing, not a scan of the data
+    def partition_values(self, cursor, table_name, column, latest):
+        try:
+            cursor.execute(f"SHOW PARTITIONS {table_name}")
+        except Exception:
+            # Not partitioned on `column` (or not a Delta/Hive table): fall back to a DISTINCT query
+            return super().partition_values(cursor, table_name, column, latest)
+        names = [d[0] for d in cursor.description]
+        if column not in names:
+            return super().partition_values(cursor, table_name, column, latest)
+        index = names.index(column)
+        values = {row[index] for row in cursor.fetchall() if row[index] is not None}
+        return sorted(values, reverse=True)[:int(latest)]
+
+    # Latest Delta commit version; non-Delta tables have no history and are never cached
+    def table_version(self, cursor, table_name):
+        cursor.execute(f"DESCRIBE HISTORY {table_name} LIMIT 1")
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        history = dict(zip([d[0] for d in cursor.description], row))
+        return f"delta:{history['version']}"
+
+
+# Local SQLite file, no network; connections may be handed between pool threads
+class SQLiteBackend(Backend):
+    name = "sqlite"
+    required_settings = ("SMOKE_TEST_DATABASE",)
+    string_type = "TEXT"
+    column_types = None
+
+    def connect(self):
+        import sqlite3
+        connection = sqlite3.connect(self.setting("SMOKE_TEST_DATABASE"), check_same_thread=False)
+        connection.create_function("smoke_hash", -1, smoke_hash, deterministic=True)
+        return connection
+
+    def row_hash(self, columns):
+        return f"smoke_hash({', '.join(columns)})"
+
+    def sample_source(self, table_name, percent, rows=None, key=None):
+        # Without a key, a multiplicative hash of rowid stays in SQL and avoids a Python UDF call per row
+        hash_expr = f"smoke_hash({key})" if key else "(rowid * 2654435761)"
+        return self._hashed_sample(table_name, percent, rows, hash_expr)
+
+    def approx_distinct(self, column):
+        return None
+
+    def fetch_arrow(self, cursor):
+        return None
+
+    # No information_schema: pragma_table_info joined over sqlite_master answers all tables at once
+    def fetch_schemas(self, cursor, tables):
+        names = {name.split(".")[-1].lower(): name for name in tables}
+        cursor.execute(
+            f"SELECT m.name, p.name, p.type FROM sqlite_master m JOIN pragma_table_info(m.name) p "
+            f"WHERE m.type IN ('table', 'view') "
+            f"AND lower(m.name) IN ({', '.join(sql_literal(n) for n in sorted(names))}) ORDER BY m.name, p.cid"
+        )
+        schemas = {}
+        for table, column, data_type in cursor.fetchall():
+            schemas.setdefault(names[table.lower()], []).append((column, data_type))
+        return schemas
+
+    def count_distinct(self, columns):
+        if len(columns) == 1:
+            return super().count_distinct(columns)
+        key = " || ',' || ".join(f"quote({c})" for c in columns)
+        return f"COUNT(DISTINCT CASE WHEN {self.non_null(columns)} THEN {key} END)"
+
+    def table_version(self, cursor, table_name):
+        return self._file_version("-wal")
+
+
+# Local DuckDB file, a columnar in-process engine closer to warehouse behaviour
+class DuckDBBackend(Backend):
+    name = "duckdb"
+    required_settings = ("SMOKE_TEST_DATABASE",)
+    string_type = "VARCHAR"
+
+    def connect(self):
+        import duckdb
+        connection = duckdb.connect(self.setting("SMOKE_TEST_DATABASE"))
+        # UTC like a SQL warehouse session, so TIMESTAMPTZ values cast to TIMESTAMP stay in UTC; GLOBAL so that
+        # the cursors (separate DuckDB client contexts) inherit it
+        connection.execute("SET GLOBAL TimeZone = 'UTC'")
+        return connection
+
+    def row_hash(self, columns):
+        return f"(hash({', '.join(columns)}) % {HASH_MODULUS})"
+
+    def sample_source(self, table_name, percent, rows=None, key=None):
+        return self._hashed_sample(table_name, percent, rows, f"hash({key or 'rowid'})")
+
+    def placeholder(self, name):
+        return f"${name}"
+
+    def fetch_arrow(self, cursor):
+        if hasattr(cursor, "to_arrow_table"):
+            return cursor.to_arrow_table()
+        return cursor.fetch_arrow_table()
+
+    def count_distinct(self, columns):
+        if len(columns) == 1:
+            return super().count_distinct(columns)
+        return f"COUNT(DISTINCT CASE WHEN {self.non_null(columns)} THEN row({', '.join(columns)}) END)"
+
+    def table_version(self, cursor, table_name):
+        return self._file_version(".wal")
+
+
+# SQLite UDF: stable non-negative 31-bit hash of its arguments
+def smoke_hash(*values):
+    return hash64(values) >> 33
+
+
+class InjectedFaultError(Exception):
+    pass
+
+
+# Stand-in driver that wraps another backend (SMOKE_TEST_FAULT_BACKEND, sqlite by default) and injects the
+# transient failures retries must absorb: connects fail as a starting warehouse for the first
+# SMOKE_TEST_FAULT_COLD_START seconds, each statement is throttled with probability SMOKE_TEST_FAULT_RATE, and
+# with probability SMOKE_TEST_FAULT_DROP_RATE the session is dropped (that statement and every later one on the
+# connection fail with a connection reset)
+class FaultInjectingBackend:
+    name = "faulty"
+
+    def __init__(self, env=None):
+        self.env = os.environ if env is None else env
+        self.inner = get_backend(self.env.get("SMOKE_TEST_FAULT_BACKEND", "sqlite"), self.env)
+        self.required_settings = self.inner.required_settings
+        self.rate = float(self.env.get("SMOKE_TEST_FAULT_RATE", 0.2))
+        self.drop_rate = float(self.env.get("SMOKE_TEST_FAULT_DROP_RATE", 0))
+        self.ready_at = time.monotonic() + float(self.env.get("SMOKE_TEST_FAULT_COLD_START", 0))
+        seed = self.env.get("SMOKE_TEST_FAULT_SEED")
+        self._rng = random.Random(int(seed) if seed else None)
+        self._lock = threading.Lock()
+        self.injected = 0
+
+    def connect(self):
+        if time.monotonic() < self.ready_at:
+            self._inject("[TEMPORARILY_UNAVAILABLE] 503 Service Unavailable: warehouse is starting")
+        return FaultyConnection(self.inner.connect(), self)
+
+    def maybe_fail(self, connection):
+        with self._lock:
+            roll = self._rng.random()
+        if connection.dropped or roll < self.drop_rate:
+            connection.dropped = True
+            self._inject("Connection reset by peer", ConnectionResetError)
+        if roll < self.drop_rate + self.rate:
+            self._inject("429 Too Many Requests: request rate limit exceeded")
+
+    def _inject(self, message, error=InjectedFaultError):
+        with self._lock:
+            self.injected += 1
+        raise error(message)
+
+    # SQL dialect, versions, schemas etc. are the wrapped backend's
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+
+class FaultyCursor:
+    def __init__(self, cursor, backend, connection):
+        self._cursor = cursor
+        self._backend = backend
+        self._connection = connection
+
+    def execute(self, *args, **kwargs):
+        self._backend.maybe_fail(self._connection)
+        return self._cursor.execute(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class FaultyConnection:
+    def __init__(self, connection, backend):
+        self._connection = connection
+        self._backend = backend
+        self.dropped = False
+
+    def cursor(self, *args, **kwargs):
+        return FaultyCursor(self._connection.cursor(*args, **kwargs), self._backend, self)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+BACKENDS = {backend.name: backend
+            for backend in (DatabricksBackend, SQLiteBackend, DuckDBBackend, FaultInjectingBackend)}
+
+
+# Backend selected by name or SMOKE_TEST_BACKEND
+def get_backend(name=None, env=None):
+    env = os.environ if env is None else env
+    name = name or env.get("SMOKE_TEST_BACKEND", DEFAULT_BACKEND)
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown SMOKE_TEST_BACKEND '{name}', expected one of: {', '.join(BACKENDS)}.")
+    return BACKENDS[name](env)
@@ -0,0 +1,89 @@
+# smoketest/cache.py
+# Purpose: On-disk cache of passing smoke check results keyed by table identity, check definition and table version
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from dataclasses import asdict, replace
+
+from checks import CheckResult
+
+DEFAULT_TTL = 86400.0
+DEFAULT_MAX_ENTRIES = 1000
+
+
+# JSON file of {key: {"version", "result", "stored_at", "used_at"}}; expired entries and the
+# least recently used entries beyond max_entries are evicted on save
+class ResultCache:
+    def __init__(self, path, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                # A corrupt cache only costs a full run
+                self.entries = {}
+
+    @staticmethod
+    def key(backend, table, signature):
+        digest = hashlib.sha256(signature.encode()).hexdigest()[:16]
+        return f"{backend.name}:{table}:{digest}"
+
+    # Cached result if the table is at the same version and the entry is fresh, else None
+    def get(self, key, version):
+        entry = self.entries.get(key)
+        now = time.time()
+        if version is None or entry is None or entry["version"] != version or now - entry["stored_at"] > self.ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry["used_at"] = now
+        result = CheckResult(**entry["result"])
+        return replace(result, message=f"{result.message} (cached)", elapsed=0.0)
+
+    # Only passing results are cached; failures are always re-checked
+    def put(self, key, version, result):
+        if version is None or not result.passed:
+            return
+        now = time.time()
+        self.entries[key] = {"version": version, "result": asdict(result), "stored_at": now, "used_at": now}
+
+    def save(self):
+        now = time.time()
+        entries = {k: e for k, e in self.entries.items() if now - e["stored_at"] <= self.ttl}
+        if len(entries) > self.max_entries:
+            newest = sorted(entries, key=lambda k: entries[k]["used_at"], reverse=True)[:self.max_entries]
+            entries = {k: entries[k] for k in newest}
+        self.entries = entries
+
+        # Write then rename so an interrupted run never leaves a truncated cache
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.path)
+
+    def summary(self):
+        return f"Cache: {self.hits} hits, {self.misses} misses."
+
+
+# Look up every table's version concurrently over the pool; tables whose version is unknown map to None
+def fetch_versions(tables, pool, backend, workers):
+    def version(table_name):
+        try:
+            with pool.connection() as connection:
+                with closing(connection.cursor()) as cursor:
+                    return backend.table_version(cursor, table_name)
+        except Exception:
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(tables)))) as executor:
+        return dict(zip(tables, executor.map(version, tables)))
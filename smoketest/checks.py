@@ -0,0 +1,77 @@
+# smoketest/checks.py
+# Purpose: Table checks shared by the smoke test runners
+
+import time
+from contextlib import closing
+from dataclasses import dataclass, field
+from typing import Optional
+
+# Check modes:
+#   metadata - answer "non-empty" from DESCRIBE DETAIL, probing when the table is not Delta
+#   probe    - SELECT 1 ... LIMIT 1, reads at most one row
+#   count    - exact SELECT COUNT(*), full scan on non-Delta tables
+MODES = ("metadata", "probe", "count")
+DEFAULT_MODE = "metadata"
+
+
+# Outcome of a single table check
+@dataclass
+class CheckResult:
+    table: str
+    passed: bool
+    message: str
+    rows: Optional[int] = None
+    elapsed: float = 0.0
+    timed_out: bool = False
+    details: list = field(default_factory=list)
+
+
+# Exact row count
+def count_rows(cursor, table_name):
+    cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+    return cursor.fetchone()[0]
+
+
+# True if at least one row exists; stops after the first row
+def probe_rows(cursor, table_name):
+    cursor.execute(f"SELECT 1 FROM {table_name} LIMIT 1")
+    return cursor.fetchone() is not None
+
+
+# Non-empty according to Delta metadata, or None when the table has no Delta detail
+def detail_has_rows(cursor, table_name):
+    try:
+        cursor.execute(f"DESCRIBE DETAIL {table_name}")
+        row = cursor.fetchone()
+    except Exception:
+        return None
+    if row is None:
+        return None
+    detail = dict(zip([d[0] for d in cursor.description], row))
+    if detail.get("format") != "delta" or detail.get("numFiles") is None:
+        return None
+    return detail["numFiles"] > 0 and (detail.get("sizeInBytes") or 0) > 0
+
+
+# Validate that a table exists and holds at least one row
+def check_table(connection, table_name, mode=DEFAULT_MODE):
+    started = time.monotonic()
+    count = None
+    try:
+        with closing(connection.cursor()) as cursor:
+            if mode == "count":
+                count = count_rows(cursor, table_name)
+                has_rows = count > 0
+            else:
+                has_rows = detail_has_rows(cursor, table_name) if mode == "metadata" else None
+                if has_rows is None:
+                    has_rows = probe_rows(cursor, table_name)
+    except Exception as e:
+        return CheckResult(table_name, False, f"Smoke test failed: {e}", elapsed=time.monotonic() - started)
+
+    elapsed = time.monotonic() - started
+    if not has_rows:
+        return CheckResult(table_name, False, f"Table {table_name} exists but is empty.", count, elapsed)
+    if count is None:
+        return CheckResult(table_name, True, f"Table {table_name} is not empty.", elapsed=elapsed)
+    return CheckResult(table_name, True, f"Table {table_name} has {count} rows.", count, elapsed)
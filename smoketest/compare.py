@@ -0,0 +1,209 @@
+# smoketest/compare.py
+# Purpose: Cross-target table comparison (dev / qa / prod) from bucketed, order-independent checksums computed in SQL
+#
+# Each side groups the table into buckets by a hash of its key and returns, per bucket, the row count and
+# the SUM of row hashes: a few dozen rows instead of the table. Mismatching buckets are compared again one
+# level down, Merkle-style: bucket p at modulus m splits into the `buckets` children p + k*m at modulus
+# m*buckets, restricted to rows with hash % m == p. Descent stops once the differing buckets hold at most
+# `leaf_rows` rows; only then are key + row hash fetched, for those buckets alone, to name the missing,
+# extra and changed rows. Locating a few differences in N rows costs about log_buckets(N / leaf_rows)
+# small aggregate queries per side instead of an export. Table names may contain "{target}"
+# (e.g. "{target}_catalog.gold.orders") to resolve per target.
+#
+# Per table in the rules file: "compare": {"key": ["order_id"], "buckets": 64, "leaf_rows": 1000}. Without
+# a key the whole row is the key, so a changed row shows up as one missing and one extra row.
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+from backends import HASH_MODULUS
+from checks import CheckResult
+from profiling import table_columns
+from retry import Retrier, warm_up
+from streaming import iter_rows
+
+DEFAULT_BUCKETS = 64
+DEFAULT_LEAF_ROWS = 1000
+DEFAULT_SAMPLE_ROWS = 5
+# Drill-down stops collecting rows beyond this many per side
+DEFAULT_DRILL_LIMIT = 100000
+# Descent stops when this many buckets differ: the differences are too widespread to narrow down
+MAX_MISMATCHED_BUCKETS = 1000
+
+
+def in_list(buckets):
+    return ", ".join(str(b) for b in sorted(buckets))
+
+
+# {bucket: (row count, checksum)} for one side, bucketing by key hash % modulus; with `parents`, only rows
+# whose key hash % parent_modulus is one of them
+def bucket_checksums(cursor, backend, table_name, key, columns, modulus, parents=None, parent_modulus=None):
+    key_hash = backend.row_hash(key)
+    where = f" WHERE {key_hash} % {parent_modulus} IN ({in_list(parents)})" if parents else ""
+    cursor.execute(
+        f"SELECT {key_hash} % {modulus} AS bucket, COUNT(*) AS row_count, "
+        f"SUM({backend.row_hash(columns)}) AS checksum FROM {table_name}{where} GROUP BY 1"
+    )
+    return {int(bucket): (int(count), int(checksum or 0)) for bucket, count, checksum in cursor.fetchall()}
+
+
+# {key tuple: row hash} for the rows of the given buckets, or None past `limit` rows
+def bucket_rows(cursor, backend, table_name, key, columns, modulus, selected, limit=DEFAULT_DRILL_LIMIT):
+    cursor.execute(
+        f"SELECT {', '.join(key)}, {backend.row_hash(columns)} FROM {table_name} "
+        f"WHERE {backend.row_hash(key)} % {modulus} IN ({in_list(selected)})"
+    )
+    rows = {}
+    for row in iter_rows(cursor):
+        if len(rows) >= limit:
+            return None
+        rows[tuple(row[:-1])] = row[-1]
+    return rows
+
+
+# Missing / extra / changed keys between two {key: row hash} maps
+def diff_rows(source, target):
+    missing = [k for k in source if k not in target]
+    extra = [k for k in target if k not in source]
+    changed = [k for k in source if k in target and source[k] != target[k]]
+    return missing, extra, changed
+
+
+# Compares tables between two targets over one connection per side; both sides run concurrently. Connections
+# go through `retrier` (transient errors retried), after a warm-up of up to `warmup_timeout` seconds per side.
+class TargetComparison:
+    def __init__(self, backend, source, target, buckets=DEFAULT_BUCKETS, sample_rows=DEFAULT_SAMPLE_ROWS,
+                 leaf_rows=DEFAULT_LEAF_ROWS, retrier=None, warmup_timeout=0):
+        self.source = source
+        self.target = target
+        self.backends = (backend.for_target(source), backend.for_target(target))
+        # Without target-specific settings both sides connect to the same place
+        self.same_connection = len({tuple(b.setting(key) for key in b.required_settings) for b in self.backends}) == 1
+        self.buckets = buckets
+        self.sample_rows = sample_rows
+        self.leaf_rows = leaf_rows
+        self.retrier = retrier or Retrier()
+        self.warmup_timeout = warmup_timeout
+        self.queries = 0
+
+    def label(self, table):
+        return f"{table.format(target=self.source)} [{self.source} vs {self.target}]"
+
+    # Run fn(cursor, backend, table_name) on both targets at once
+    def _both(self, executor, connections, table, fn):
+        futures = []
+        for connection, backend, target in zip(connections, self.backends, (self.source, self.target)):
+            def side(connection=connection, backend=backend, target=target):
+                with closing(connection.cursor()) as cursor:
+                    return fn(cursor, backend, table.format(target=target))
+            futures.append(executor.submit(side))
+        self.queries += 1
+        return [future.result() for future in futures]
+
+    # Descend the bucket tree; returns (source rows, mismatched buckets, modulus, levels)
+    def _locate(self, executor, connections, table, key, columns, buckets, leaf_rows):
+        modulus, parents, parent_modulus, levels = buckets, None, None, 0
+        while True:
+            source_sums, target_sums = self._both(
+                executor, connections, table,
+                lambda cursor, backend, name: bucket_checksums(cursor, backend, name, key, columns, modulus,
+                                                               parents, parent_modulus)
+            )
+            levels += 1
+            if parents is None:
+                rows = sum(count for count, _ in source_sums.values())
+            mismatched = {b for b in source_sums.keys() | target_sums.keys()
+                          if source_sums.get(b) != target_sums.get(b)}
+            differing_rows = max(sum(sums.get(b, (0, 0))[0] for b in mismatched) for sums in (source_sums, target_sums))
+            if (not mismatched or differing_rows <= leaf_rows or len(mismatched) > MAX_MISMATCHED_BUCKETS
+                    or modulus * buckets > HASH_MODULUS):
+                return rows, mismatched, modulus, levels
+            parents, parent_modulus, modulus = mismatched, modulus, modulus * buckets
+
+    def compare_table(self, executor, connections, table, spec):
+        label = self.label(table)
+        started = time.monotonic()
+        buckets = int(spec.get("buckets", self.buckets))
+        leaf_rows = int(spec.get("leaf_rows", self.leaf_rows))
+        self.queries = 0
+        try:
+            source_columns, target_columns = self._both(executor, connections, table,
+                                                        lambda cursor, backend, name: table_columns(cursor, name))
+            if [c.lower() for c in source_columns] != [c.lower() for c in target_columns]:
+                only_source = [c for c in source_columns if c not in target_columns]
+                only_target = [c for c in target_columns if c not in source_columns]
+                return CheckResult(label, False, "Columns differ between targets.", elapsed=time.monotonic() - started,
+                                   details=[f"only in {self.source}: {', '.join(only_source) or '-'}",
+                                            f"only in {self.target}: {', '.join(only_target) or '-'}"])
+            key = spec.get("key") or source_columns
+            key = [key] if isinstance(key, str) else key
+
+            rows, mismatched, modulus, levels = self._locate(executor, connections, table, key, source_columns,
+                                                             buckets, leaf_rows)
+            if not mismatched:
+                return CheckResult(label, True, f"{rows} rows match across {buckets} buckets.", rows,
+                                   time.monotonic() - started)
+            if len(mismatched) > MAX_MISMATCHED_BUCKETS:
+                return CheckResult(label, False, f"{len(mismatched)} of {modulus} buckets differ; too many "
+                                   f"differences to list.", rows, time.monotonic() - started)
+
+            source_rows, target_rows = self._both(
+                executor, connections, table,
+                lambda cursor, backend, name: bucket_rows(cursor, backend, name, key, source_columns, modulus,
+                                                          mismatched)
+            )
+        except Exception as e:
+            return CheckResult(label, False, f"Comparison failed: {e}", elapsed=time.monotonic() - started)
+
+        elapsed = time.monotonic() - started
+        message = (f"{len(mismatched)} of {modulus} buckets differ after {levels} levels "
+                   f"({self.queries} queries per target)")
+        if source_rows is None or target_rows is None:
+            return CheckResult(label, False, f"{message}; too many rows in them to list.", rows, elapsed)
+        missing, extra, changed = diff_rows(source_rows, target_rows)
+        details = []
+        for name, keys in ((f"missing in {self.target}", missing), (f"extra in {self.target}", extra),
+                           ("changed", changed)):
+            if keys:
+                shown = ", ".join(str(k if len(k) > 1 else k[0]) for k in keys[:self.sample_rows])
+                details.append(f"{name}: {len(keys)} ({shown}{', ...' if len(keys) > self.sample_rows else ''})")
+        return CheckResult(label, False, f"{message}: {len(missing)} missing, {len(extra)} extra, "
+                                         f"{len(changed)} changed rows.", rows, elapsed, details=details)
+
+    def connect(self, backend):
+        if self.warmup_timeout > 0:
+            warm_up(backend.connect, self.warmup_timeout, self.retrier.policy)
+        return self.retrier.wrap_connect(backend.connect)()
+
+    # Same connection settings and the same table name on both sides would compare a table with itself
+    def same_table(self, table):
+        return self.same_connection and table.format(target=self.source) == table.format(target=self.target)
+
+    # specs: {table: {"key", "buckets"}}
+    def run(self, tables, specs=None):
+        specs = specs or {}
+        results = {table: CheckResult(self.label(table), False, (
+            f"Configuration error: {self.source} and {self.target} resolve to the same table; set target settings "
+            f"(e.g. SMOKE_TEST_DATABASE_{self.target.upper()}) or use {{target}} in the table name."))
+            for table in tables if self.same_table(table)}
+        remaining = [table for table in tables if table not in results]
+        connections = []
+        try:
+            if remaining:
+                try:
+                    for backend in self.backends:
+                        connections.append(self.connect(backend))
+                except Exception as e:
+                    side = (self.source, self.target)[len(connections)]
+                    results.update({table: CheckResult(self.label(table), False,
+                                                       f"Comparison failed: cannot connect to {side}: {e}")
+                                    for table in remaining})
+                    remaining = []
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                for table in remaining:
+                    results[table] = self.compare_table(executor, connections, table, specs.get(table, {}))
+        finally:
+            for connection in connections:
+                connection.close()
+        return [results[table] for table in tables]
@@ -0,0 +1,137 @@
+# smoketest/connection_pool.py
+# Purpose: Bounded DB-API connection pool so a batch of smoke checks reuses warehouse sessions
+
+import threading
+import time
+from contextlib import closing, contextmanager
+
+DEFAULT_POOL_SIZE = 8
+DEFAULT_IDLE_TIMEOUT = 300.0
+DEFAULT_CHECK_AFTER = 30.0
+HEALTH_CHECK_QUERY = "SELECT 1"
+
+
+class PoolClosedError(RuntimeError):
+    pass
+
+
+# Thread-safe pool around any DB-API connect callable, e.g.
+#   ConnectionPool(lambda: sql.connect(server_hostname=..., http_path=..., access_token=...))
+#   ConnectionPool(lambda: sqlite3.connect(path, check_same_thread=False))
+#
+# size         - maximum number of open connections
+# idle_timeout - idle connections older than this are closed instead of reused
+# check_after  - connections idle for longer than this are health-checked on checkout
+class ConnectionPool:
+    def __init__(self, connect, size=DEFAULT_POOL_SIZE, idle_timeout=DEFAULT_IDLE_TIMEOUT,
+                 check_after=DEFAULT_CHECK_AFTER, health_check=HEALTH_CHECK_QUERY):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1.")
+        self._connect = connect
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.check_after = check_after
+        self.health_check = health_check
+        self._idle = []  # (connection, released_at), most recently used last
+        self._open = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self.stats = {"created": 0, "reused": 0, "discarded": 0}
+
+    # Check out a connection, waiting up to `timeout` seconds when the pool is exhausted
+    def acquire(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                connection, released_at = self._wait_for_slot(deadline)
+                if connection is None:
+                    # Reserve the slot before connecting outside the lock
+                    self._open += 1
+
+            if connection is None:
+                try:
+                    connection = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._open -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self.stats["created"] += 1
+                return connection
+
+            idle_for = time.monotonic() - released_at
+            if idle_for > self.idle_timeout or (idle_for > self.check_after and not self._healthy(connection)):
+                self._discard(connection)
+                continue
+            with self._cond:
+                self.stats["reused"] += 1
+            return connection
+
+    # Return a connection; broken connections should be discarded rather than reused. Connections flagged
+    # `broken` (RetryingConnection after a lost session) are always discarded.
+    def release(self, connection, discard=False):
+        discard = discard or getattr(connection, "broken", False)
+        with self._cond:
+            if not discard and not self._closed:
+                self._idle.append((connection, time.monotonic()))
+                self._cond.notify()
+                return
+        self._discard(connection)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        connection = self.acquire(timeout)
+        try:
+            yield connection
+        except BaseException:
+            self.release(connection, discard=True)
+            raise
+        self.release(connection)
+
+    # Close idle connections and refuse further checkouts; checked-out connections close on release
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for connection, _ in idle:
+            self._discard(connection)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _wait_for_slot(self, deadline):
+        while True:
+            if self._closed:
+                raise PoolClosedError("Connection pool is closed.")
+            if self._idle:
+                return self._idle.pop()
+            if self._open < self.size:
+                return None, None
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError(f"No connection available within the pool limit of {self.size}.")
+            self._cond.wait(remaining)
+
+    def _healthy(self, connection):
+        try:
+            with closing(connection.cursor()) as cursor:
+                cursor.execute(self.health_check)
+                cursor.fetchall()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._open -= 1
+            self.stats["discarded"] += 1
+            self._cond.notify()
@@ -0,0 +1,202 @@
+# smoketest/local_files.py
+# Purpose: Offline validation of local Parquet/CSV extracts on a process pool with mergeable partial aggregates
+#
+# Layout under SMOKE_TEST_LOCAL_DIR: one entry per table, either a single file (orders.csv) or a directory
+# of part files (orders/part-0000.parquet, ...). Work is sharded per CSV file and per Parquet row group;
+# each worker returns a Partial (row count, per-column non-null count, min/max and HyperLogLog sketch, and an
+# order-independent row checksum) and the parent merges them, so the result does not depend on sharding.
+# A file that cannot be read or does not match its siblings fails only the table it belongs to.
+
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from checks import CheckResult
+from hll import HyperLogLog, hash64
+from streaming import DEFAULT_BATCH_ROWS
+
+EXTENSIONS = (".csv", ".parquet")
+CHECKSUM_MOD = 1 << 64
+
+
+@dataclass
+class ColumnPartial:
+    non_null: int = 0
+    min: object = None
+    max: object = None
+    sketch: HyperLogLog = field(default_factory=HyperLogLog)
+
+    def update(self, values):
+        present = [v for v in values if v is not None]
+        if not present:
+            return
+        self.non_null += len(present)
+        low, high = min(present), max(present)
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        self.sketch.update(present)
+
+    def merge(self, other):
+        self.non_null += other.non_null
+        for bound, pick in (("min", min), ("max", max)):
+            mine, theirs = getattr(self, bound), getattr(other, bound)
+            setattr(self, bound, theirs if mine is None else mine if theirs is None else pick(mine, theirs))
+        self.sketch.merge(other.sketch)
+        return self
+
+
+# Aggregates of one shard; merge() is associative and commutative
+@dataclass
+class Partial:
+    columns: list
+    rows: int = 0
+    checksum: int = 0
+    files: set = field(default_factory=set)
+    stats: dict = field(default_factory=dict)
+
+    def update(self, batch):
+        for column, values in zip(self.columns, batch):
+            self.stats.setdefault(column, ColumnPartial()).update(values)
+        for row in zip(*batch):
+            self.checksum = (self.checksum + hash64(row)) % CHECKSUM_MOD
+            self.rows += 1
+
+    def merge(self, other):
+        if other.columns != self.columns:
+            raise ValueError(f"Column mismatch between {', '.join(sorted(os.path.basename(f) for f in self.files))} "
+                             f"{self.columns} and {', '.join(os.path.basename(f) for f in other.files)} "
+                             f"{other.columns}")
+        self.rows += other.rows
+        self.checksum = (self.checksum + other.checksum) % CHECKSUM_MOD
+        self.files |= other.files
+        for column, stat in other.stats.items():
+            self.stats.setdefault(column, ColumnPartial()).merge(stat)
+        return self
+
+
+# {table: [file paths]} for the entries of `directory`
+def discover(directory):
+    tables = {}
+    for entry in sorted(os.listdir(directory)):
+        path = os.path.join(directory, entry)
+        if os.path.isdir(path):
+            files = [os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith(EXTENSIONS)]
+            if files:
+                tables[entry] = files
+        elif entry.endswith(EXTENSIONS):
+            tables[os.path.splitext(entry)[0]] = [path]
+    return tables
+
+
+# Units of work: (table, path, row group) per Parquet row group, (table, path, None) per CSV file; returns
+# (units, {table: error}) for files whose metadata cannot be read
+def shards(tables):
+    units, errors = [], {}
+    for table, files in tables.items():
+        for path in files:
+            if path.endswith(".parquet"):
+                try:
+                    import pyarrow.parquet as pq
+                    units += [(table, path, i) for i in range(pq.ParquetFile(path).num_row_groups)]
+                except Exception as e:
+                    errors.setdefault(table, f"{os.path.basename(path)}: {e}")
+            else:
+                units.append((table, path, None))
+    return units, errors
+
+
+# Worker entry point: aggregate one shard. CSV values stay text (min/max compare as strings) and empty
+# fields count as NULL.
+def scan_shard(unit, batch_rows=DEFAULT_BATCH_ROWS):
+    table, path, row_group = unit
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        data = pq.ParquetFile(path).read_row_group(row_group)
+        partial = Partial(data.column_names, files={path})
+        for batch in data.to_batches(batch_rows):
+            partial.update([column.to_pylist() for column in batch.columns])
+        return table, partial
+
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        partial = Partial(next(reader, []), files={path})
+        rows = []
+        for row in reader:
+            rows.append([value if value != "" else None for value in row])
+            if len(rows) >= batch_rows:
+                partial.update(list(zip(*rows)))
+                rows = []
+        if rows:
+            partial.update(list(zip(*rows)))
+    return table, partial
+
+
+# Worker entry point that never raises: (table, Partial), or (table, error message) for an unreadable shard
+def scan_shard_safely(unit):
+    try:
+        return scan_shard(unit)
+    except Exception as e:
+        return unit[0], f"{os.path.basename(unit[1])}: {e}"
+
+
+# Scan every shard on `processes` worker processes (in-process when 1) and merge per table; returns
+# ({table: Partial}, {table: first error})
+def aggregate(tables, processes=None):
+    units, errors = shards(tables)
+    if processes == 1:
+        return merge_partials(map(scan_shard_safely, units), errors)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        # One shard per task keeps workers busy when shard sizes are uneven
+        return merge_partials(executor.map(scan_shard_safely, units, chunksize=1), errors)
+
+
+def merge_partials(scanned, errors=None):
+    merged, errors = {}, dict(errors or {})
+    for table, partial in scanned:
+        if table in errors:
+            continue
+        if isinstance(partial, str):
+            errors[table] = partial
+        elif table in merged:
+            try:
+                merged[table].merge(partial)
+            except ValueError as e:
+                errors[table] = str(e)
+        else:
+            merged[table] = partial
+    for table in errors:
+        merged.pop(table, None)
+    return merged, errors
+
+
+# One CheckResult per table: passes when the extract has rows
+def check_local_files(directory, processes=None):
+    started = time.monotonic()
+    tables = discover(directory)
+    try:
+        merged, errors = aggregate(tables, processes)
+    except Exception as e:
+        elapsed = time.monotonic() - started
+        return [CheckResult(table, False, f"Local validation failed: {e}", elapsed=elapsed) for table in tables]
+
+    elapsed = time.monotonic() - started
+    results = []
+    for table in tables:
+        partial = merged.get(table)
+        if table in errors:
+            results.append(CheckResult(table, False, f"Local validation failed: {errors[table]}", elapsed=elapsed))
+            continue
+        if partial is None or not partial.rows:
+            results.append(CheckResult(table, False, f"Extract {table} is empty.", 0, elapsed))
+            continue
+        details = [f"checksum {partial.checksum:016x}"]
+        for column in partial.columns:
+            stat = partial.stats.get(column, ColumnPartial())
+            null_rate = (partial.rows - stat.non_null) / partial.rows
+            details.append(f"{column}: null_rate {null_rate:.2%}, distinct ≈{stat.sketch.count()} "
+                           f"±{stat.sketch.relative_error:.0%}, range [{stat.min}, {stat.max}]")
+        results.append(CheckResult(table, True, f"Extract {table} has {partial.rows} rows in "
+                                   f"{len(partial.files)} files.", partial.rows, elapsed, details=details))
+    return results
@@ -0,0 +1,77 @@
+# smoketest/partitions.py
+# Purpose: Partition discovery and pruning predicates so checks on partitioned tables read only recent partitions
+#
+# Scope spec (per table as "partitions" in the rules file, or from the SMOKE_TEST_PARTITION* variables):
+#   {"column": "event_date", "latest": 3}                        - the 3 newest partition values
+#   {"column": "event_date", "since": "2024-06-01", "until": ...} - a value range, bounds inclusive
+# "column" may be omitted where the engine reports partition columns (Delta tables on Databricks).
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import date, datetime
+
+
+# WHERE clause restricting a table to its scoped partitions, and how to describe it in messages
+@dataclass
+class PartitionScope:
+    where: str
+    description: str
+
+
+def sql_literal(value):
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat(" ") if isinstance(value, datetime) else value.isoformat()
+    text = str(value).replace("'", "''")
+    return f"'{text}'"
+
+
+# PartitionScope for one table, or None when no partition column is configured or discovered
+def resolve_scope(cursor, backend, table_name, spec):
+    column = spec.get("column")
+    if not column:
+        discovered = backend.partition_columns(cursor, table_name)
+        if not discovered:
+            return None
+        column = discovered[0]
+
+    if spec.get("since") is not None or spec.get("until") is not None:
+        bounds, text = [], []
+        if spec.get("since") is not None:
+            bounds.append(f"{column} >= {sql_literal(spec['since'])}")
+            text.append(f"from {spec['since']}")
+        if spec.get("until") is not None:
+            bounds.append(f"{column} <= {sql_literal(spec['until'])}")
+            text.append(f"until {spec['until']}")
+        return PartitionScope(" AND ".join(bounds), f"{column} partitions {' '.join(text)}")
+
+    values = backend.partition_values(cursor, table_name, column, int(spec.get("latest", 1)))
+    if not values:
+        return PartitionScope("1 = 0", f"{column} partitions (none found)")
+    # A range from the oldest of the newest N values selects the same partitions and prunes like an IN list
+    oldest, newest = min(values), max(values)
+    return PartitionScope(f"{column} >= {sql_literal(oldest)}",
+                          f"latest {len(values)} {column} partitions ({oldest} .. {newest})")
+
+
+# Resolve every table's scope concurrently over the pool; discovery errors leave the table unscoped
+# so the check itself reports the problem
+def resolve_scopes(specs, pool, backend, workers):
+    def scope(table_name):
+        try:
+            with pool.connection() as connection:
+                with closing(connection.cursor()) as cursor:
+                    return resolve_scope(cursor, backend, table_name, specs[table_name])
+        except Exception:
+            return None
+
+    tables = list(specs)
+    if not tables:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(tables)))) as executor:
+        scopes = dict(zip(tables, executor.map(scope, tables)))
+    return {table: s for table, s in scopes.items() if s is not None}
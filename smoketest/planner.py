@@ -0,0 +1,121 @@
+# smoketest/planner.py
+# Purpose: Batch query planner - combines many tables' metric queries into chunked UNION ALL statements
+
+import time
+from contextlib import closing
+
+import arrow_eval
+from checks import CheckResult
+from rules import RowCountRule, TablePlan, check_rules
+
+DEFAULT_BATCH_SIZE = 1
+
+
+# Plan for a table without rules: a LIMIT 1 probe, or an exact count in "count" mode.
+# DESCRIBE DETAIL cannot be combined into a UNION, so batched "metadata" checks probe instead.
+# With a partition scope, only the scoped partitions are probed or counted.
+def mode_plan(table, mode, backend, scope=None):
+    rules = [RowCountRule({"min": 1})]
+    if mode == "count":
+        plan = TablePlan(table, rules, backend, plain="count")
+        return plan.restrict(scope) if scope else plan
+    where = f" WHERE {scope.where}" if scope else ""
+    plan = TablePlan(table, rules, backend, source=f"(SELECT 1 FROM {table}{where} LIMIT 1) probe", plain="probe")
+    plan.scope = scope.description if scope else None
+    return plan
+
+
+# Several table plans answered by one statement. Every branch returns the plan's index plus its metrics
+# padded with NULLs to a common set of columns, so branches of any shape union cleanly.
+# With `arrow`, results are fetched as an Arrow table and evaluated columnar when pyarrow and the driver allow it;
+# metrics are then grouped by kind into typed columns (DOUBLE, TIMESTAMP) so Arrow receives them undecoded.
+# Otherwise each metric slot is one string column.
+class Batch:
+    def __init__(self, plans, backend, arrow=False):
+        self.plans = plans
+        self.tables = [plan.table for plan in plans]
+        self.backend = backend
+        self.arrow = arrow and arrow_eval.available() and backend.column_types is not None
+        # Result columns after plan_index as (name, kind), kind "string" for untyped columns; per plan, the
+        # result column of each of its metrics
+        self.columns, self.positions = [], []
+        if self.arrow:
+            widths = {}
+            for plan in plans:
+                for kind in {metric.kind for metric in plan.metrics}:
+                    widths[kind] = max(widths.get(kind, 0), sum(m.kind == kind for m in plan.metrics))
+            start = {}
+            for kind in sorted(widths):
+                start[kind] = len(self.columns)
+                self.columns += [(f"{kind}{i}", kind) for i in range(widths[kind])]
+            for plan in plans:
+                used, position = {}, []
+                for metric in plan.metrics:
+                    position.append(start[metric.kind] + used.get(metric.kind, 0))
+                    used[metric.kind] = used.get(metric.kind, 0) + 1
+                self.positions.append(position)
+        else:
+            width = max(len(plan.metrics) for plan in plans)
+            self.columns = [(f"m{i}", "string") for i in range(width)]
+            self.positions = [list(range(len(plan.metrics))) for plan in plans]
+
+    def __str__(self):
+        return f"batch[{', '.join(self.tables)}]"
+
+    def sql(self):
+        branches = []
+        for index, plan in enumerate(self.plans):
+            exprs = {column: plan.metrics[m].expr for m, column in enumerate(self.positions[index])}
+            columns = [f"{index} AS plan_index"]
+            for column, (name, kind) in enumerate(self.columns):
+                sql_type = self.backend.string_type if kind == "string" else self.backend.column_types[kind]
+                columns.append(f"CAST({exprs.get(column, 'NULL')} AS {sql_type}) AS {name}")
+            branches.append(f"SELECT {', '.join(columns)} FROM {plan.source}")
+        return "\nUNION ALL\n".join(branches)
+
+    # The metric values of plan `index` from a result row without its plan_index
+    def metric_values(self, index, row):
+        return [row[column] for column in self.positions[index]]
+
+
+# Split plans into batches of at most `size` tables
+def plan_batches(plans, size, backend, arrow=False):
+    size = max(1, size)
+    return [Batch(plans[i:i + size], backend, arrow) for i in range(0, len(plans), size)]
+
+
+# Run one batch in a single round trip and demultiplex rows back to per-table results.
+# If the statement fails (e.g. one table is missing) each plan is retried alone to isolate the failure.
+def check_batch(connection, batch):
+    started = time.monotonic()
+    table = rows = None
+    try:
+        with closing(connection.cursor()) as cursor:
+            cursor.execute(batch.sql())
+            if batch.arrow:
+                table = batch.backend.fetch_arrow(cursor)
+            if table is None:
+                rows = cursor.fetchall()
+    except Exception:
+        return [check_rules(connection, plan) for plan in batch.plans]
+
+    elapsed = time.monotonic() - started
+    if table is not None:
+        try:
+            return arrow_eval.evaluate_batch(batch, table, elapsed, connection)
+        except Exception:
+            # A metric Arrow cannot decode falls back to decoding each plan's row in Python, so it fails
+            # at most its own table
+            rows = list(zip(*(column.to_pylist() for column in table.columns)))
+    by_index = {int(row[0]): row[1:] for row in rows}
+    results = []
+    for index, plan in enumerate(batch.plans):
+        if index not in by_index:
+            results.append(CheckResult(plan.table, False, "Smoke test failed: no result row returned.",
+                                       elapsed=elapsed))
+            continue
+        try:
+            results.append(plan.evaluate(batch.metric_values(index, by_index[index]), elapsed, connection))
+        except Exception as e:
+            results.append(CheckResult(plan.table, False, f"Smoke test failed: {e}", elapsed=elapsed))
+    return results
@@ -0,0 +1,133 @@
+# smoketest/profiling.py
+# Purpose: Sampled-statistics profiling - approximate null rates, distinct counts and value ranges with error bounds
+#
+# Cost scales with the sample: Databricks reads TABLESAMPLE (n ROWS | p PERCENT), local engines a
+# hashed-key modulo filter. Distinct counts use the engine's approx_count_distinct where available and a
+# client-side HyperLogLog sketch otherwise.
+
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from typing import Optional
+
+from checks import CheckResult, probe_rows
+from hll import HyperLogLog
+from streaming import iter_column_batches
+
+DEFAULT_SAMPLE_PERCENT = 1.0
+Z_95 = 1.96
+
+
+@dataclass
+class ColumnProfile:
+    column: str
+    null_rate: float
+    null_rate_error: float
+    distinct: Optional[int]
+    distinct_error: float
+    min: object
+    max: object
+
+    def describe(self):
+        text = f"{self.column}: null_rate {self.null_rate:.2%} ±{self.null_rate_error:.2%}"
+        if self.distinct is not None:
+            text += f", distinct in sample ≈{self.distinct} ±{self.distinct_error:.0%}"
+        return text + f", range [{self.min}, {self.max}]"
+
+
+# Column names from a zero-row select
+def table_columns(cursor, table_name):
+    cursor.execute(f"SELECT * FROM {table_name} LIMIT 0")
+    cursor.fetchall()
+    return [d[0] for d in cursor.description]
+
+
+# 95% normal-approximation half-width for a proportion observed in n sampled rows;
+# at 0% or 100% the rule of three bounds the unseen rate instead
+def proportion_error(p, n):
+    if not n:
+        return 1.0
+    if p in (0.0, 1.0):
+        return min(1.0, 3 / n)
+    return Z_95 * (p * (1 - p) / n) ** 0.5
+
+
+class Profiler:
+    # overrides: {table: {"sample_percent", "sample_rows", "columns", "key"}} from the rules file
+    def __init__(self, backend, percent=DEFAULT_SAMPLE_PERCENT, rows=None, overrides=None):
+        self.backend = backend
+        self.percent = percent
+        self.rows = rows
+        self.overrides = overrides or {}
+
+    # Returns (sampled row count, (estimated table rows, 95% error) or None, [ColumnProfile])
+    def profile(self, cursor, table_name):
+        options = self.overrides.get(table_name, {})
+        percent = options.get("sample_percent", self.percent)
+        rows = options.get("sample_rows", self.rows)
+        columns = options.get("columns") or table_columns(cursor, table_name)
+        source = self.backend.sample_source(table_name, percent, rows, options.get("key"))
+
+        approx = [self.backend.approx_distinct(c) for c in columns]
+        select = ["COUNT(*)"]
+        for column, distinct in zip(columns, approx):
+            select += [f"COUNT({column})", f"MIN({column})", f"MAX({column})"]
+            if distinct:
+                select.append(distinct)
+        cursor.execute(f"SELECT {', '.join(select)} FROM {source}")
+        values = list(cursor.fetchone())
+
+        sampled = values.pop(0) or 0
+        stats = []
+        for column, distinct in zip(columns, approx):
+            non_null, low, high = values.pop(0) or 0, values.pop(0), values.pop(0)
+            stats.append([column, non_null, low, high, values.pop(0) if distinct else None])
+
+        error = self.backend.approx_distinct_error
+        if any(d is None for d in approx) and sampled:
+            # Engine has no approximate distinct: sketch the sampled values client-side
+            sketches = self._sketch(cursor, source, [c for c, d in zip(columns, approx) if d is None])
+            for stat in stats:
+                if stat[0] in sketches:
+                    stat[4] = sketches[stat[0]].count()
+                    error = sketches[stat[0]].relative_error
+
+        profiles = []
+        for column, non_null, low, high, distinct in stats:
+            null_rate = (sampled - non_null) / sampled if sampled else 0.0
+            profiles.append(ColumnProfile(column, null_rate, proportion_error(null_rate, sampled),
+                                          distinct, error, low, high))
+        estimated_rows = None
+        if not rows:
+            fraction = percent / 100
+            estimated_rows = (round(sampled / fraction), round(Z_95 * (sampled * (1 - fraction)) ** 0.5 / fraction))
+        return sampled, estimated_rows, profiles
+
+    def _sketch(self, cursor, source, columns):
+        sketches = {column: HyperLogLog() for column in columns}
+        cursor.execute(f"SELECT {', '.join(columns)} FROM {source}")
+        for batch in iter_column_batches(cursor):
+            for column, values in zip(columns, batch):
+                sketches[column].update(values)
+        return sketches
+
+    # Smoke check: profile the sample, and fall back to a probe when a small table yields an empty sample
+    def check(self, connection, table_name):
+        started = time.monotonic()
+        try:
+            with closing(connection.cursor()) as cursor:
+                sampled, estimated, profiles = self.profile(cursor, table_name)
+                has_rows = sampled > 0 or probe_rows(cursor, table_name)
+        except Exception as e:
+            return CheckResult(table_name, False, f"Smoke test failed: {e}", elapsed=time.monotonic() - started)
+
+        elapsed = time.monotonic() - started
+        details = [p.describe() for p in profiles]
+        if not has_rows:
+            return CheckResult(table_name, False, f"Table {table_name} exists but is empty.", elapsed=elapsed)
+        if not sampled:
+            return CheckResult(table_name, True, f"Table {table_name} is not empty (sample was empty).",
+                               elapsed=elapsed)
+        estimate = f", ~{estimated[0]} ±{estimated[1]} rows estimated" if estimated is not None else ""
+        return CheckResult(table_name, True, f"Table {table_name} profiled from {sampled} sampled rows{estimate}.",
+                           elapsed=elapsed, details=details)
@@ -0,0 +1,215 @@
+# smoketest/retry.py
+# Purpose: Transient-error handling - classified retries with exponential backoff and full jitter, a shared
+# circuit breaker, and a warm-up probe that absorbs warehouse cold starts before the first check
+#
+# Retries happen below the checks, in connection and cursor proxies, so every check, batch and metadata
+# lookup gets them without catching anything itself. Only statements that failed with a transient error
+# (throttling, 5xx, warehouse starting, timeouts, local lock contention) are retried; everything else
+# (missing table, syntax, permissions) surfaces on the first attempt. A statement that lost its session
+# (connection reset, broken pipe) is not retried on the dead connection: it fails, the connection is flagged
+# `broken` so the pool discards it, and the runner re-runs the check on a fresh one.
+
+import random
+import re
+import threading
+import time
+from contextlib import closing
+
+DEFAULT_ATTEMPTS = 4
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 30.0
+DEFAULT_CIRCUIT_THRESHOLD = 10
+DEFAULT_CIRCUIT_RESET = 60.0
+DEFAULT_WARMUP_TIMEOUT = 300.0
+WARMUP_QUERY = "SELECT 1"
+
+TRANSIENT_TYPES = (ConnectionError, TimeoutError)
+TRANSIENT_STATUS = (429, 502, 503, 504)
+# Status codes only count next to "HTTP" / "status": bare digits also appear in table names and parser positions
+TRANSIENT_STATUS_PATTERN = re.compile(r"\b(?:HTTP|status)\D{0,3}(?:429|50[234])\b", re.IGNORECASE)
+# Lower-cased fragments of driver messages that mean "try again later"
+TRANSIENT_MARKERS = (
+    "too many requests", "temporarily_unavailable", "temporarily unavailable", "service unavailable",
+    "bad gateway", "gateway timeout", "timed out", "connection refused", "warehouse is starting",
+    "is starting up", "database is locked", "could not set lock"
+)
+# The session is gone: retrying on the same connection cannot succeed
+CONNECTION_LOST_TYPES = (ConnectionResetError, ConnectionAbortedError, BrokenPipeError)
+CONNECTION_LOST_MARKERS = ("connection reset", "connection aborted", "broken pipe")
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+def is_connection_lost(error):
+    if isinstance(error, CONNECTION_LOST_TYPES):
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in CONNECTION_LOST_MARKERS)
+
+
+def is_transient(error):
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, TRANSIENT_TYPES) or is_connection_lost(error):
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "http_code", None)
+    if status in TRANSIENT_STATUS:
+        return True
+    message = str(error)
+    return TRANSIENT_STATUS_PATTERN.search(message) is not None or any(
+        marker in message.lower() for marker in TRANSIENT_MARKERS)
+
+
+# Exponential backoff with full jitter: attempt n sleeps uniform(0, min(max_delay, base * 2^n))
+class RetryPolicy:
+    def __init__(self, attempts=DEFAULT_ATTEMPTS, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY,
+                 rng=None):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._rng = rng or random.Random()
+
+    def delay(self, attempt):
+        return self._rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+# Opens after `threshold` consecutive transient failures across all connections; while open every call
+# fails fast, and after `reset_after` seconds one trial call is let through (half-open)
+class CircuitBreaker:
+    def __init__(self, threshold=DEFAULT_CIRCUIT_THRESHOLD, reset_after=DEFAULT_CIRCUIT_RESET):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self.trips = 0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_after or self._trial:
+                raise CircuitOpenError(f"Circuit open after {self.failures} consecutive transient failures.")
+            self._trial = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or (self.opened_at is None and self.failures >= self.threshold):
+                if self.opened_at is None:
+                    self.trips += 1
+                self.opened_at = time.monotonic()
+                self._trial = False
+
+
+class Retrier:
+    def __init__(self, policy=None, breaker=None, sleep=time.sleep):
+        self.policy = policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.sleep = sleep
+        self.retries = 0
+        self.lost = 0
+        self._lock = threading.Lock()
+
+    # Call fn, retrying transient errors per the policy; errors that reached the warehouse count as healthy
+    def call(self, fn, *args, **kwargs):
+        return self._call(fn, args, kwargs)
+
+    # A statement on `connection` (a RetryingConnection): a lost session is flagged and raised, not retried
+    def execute(self, connection, fn, *args, **kwargs):
+        return self._call(fn, args, kwargs, connection)
+
+    def _call(self, fn, args, kwargs, connection=None):
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if connection is not None and is_connection_lost(e):
+                    connection.broken = True
+                    with self._lock:
+                        self.lost += 1
+                    raise
+                if not is_transient(e):
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                attempt += 1
+                if attempt >= self.policy.attempts:
+                    raise
+                with self._lock:
+                    self.retries += 1
+                self.sleep(self.policy.delay(attempt))
+                continue
+            self.breaker.record_success()
+            return result
+
+    # connect callable for ConnectionPool: retried connects handing out retrying connections
+    def wrap_connect(self, connect):
+        return lambda: RetryingConnection(self.call(connect), self)
+
+    def summary(self):
+        text = f"Retries: {self.retries} transient errors retried"
+        if self.lost:
+            text += f", {self.lost} lost connections replaced"
+        if self.breaker.trips:
+            text += f", circuit opened {self.breaker.trips} times"
+        return text + "."
+
+
+class RetryingCursor:
+    def __init__(self, cursor, retrier, connection):
+        self._cursor = cursor
+        self._retrier = retrier
+        self._connection = connection
+
+    def execute(self, *args, **kwargs):
+        return self._retrier.execute(self._connection, self._cursor.execute, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+# `broken` is set once a statement lost the session; ConnectionPool discards broken connections on release
+class RetryingConnection:
+    def __init__(self, connection, retrier):
+        self._connection = connection
+        self._retrier = retrier
+        self.broken = False
+
+    def cursor(self, *args, **kwargs):
+        return RetryingCursor(self._connection.cursor(*args, **kwargs), self._retrier, self)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+# Connect and run WARMUP_QUERY until it succeeds or `timeout` passes, backing off between attempts;
+# returns the seconds waited. Bypasses the circuit breaker: a cold start is expected to fail for a while.
+def warm_up(connect, timeout=DEFAULT_WARMUP_TIMEOUT, policy=None, sleep=time.sleep):
+    policy = policy or RetryPolicy()
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        try:
+            with closing(connect()) as connection:
+                with closing(connection.cursor()) as cursor:
+                    cursor.execute(WARMUP_QUERY)
+                    cursor.fetchall()
+            return time.monotonic() - started
+        except Exception as e:
+            remaining = started + timeout - time.monotonic()
+            if not is_transient(e) or remaining <= 0:
+                raise
+            attempt += 1
+            sleep(min(remaining, policy.delay(attempt)))
@@ -0,0 +1,337 @@
+# smoketest/rules.py
+# Purpose: Declarative data-quality rules compiled into one aggregated SELECT (one scan) per table
+#
+# Rules file (JSON, or YAML when PyYAML is installed):
+#   {
+#     "tables": {
+#       "main.gold.orders": {
+#         "rules": [
+#           {"type": "row_count", "min": 1, "max": 100000000},
+#           {"type": "null_rate", "column": "customer_id", "max": 0.01},
+#           {"type": "freshness", "column": "updated_at", "max_age_hours": 24},
+#           {"type": "unique", "columns": ["order_id"]}
+#         ],
+#         "watermark": {"column": "ingested_at"},
+#         "partitions": {"column": "order_date", "latest": 3}
+#       }
+#     }
+#   }
+
+import json
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+
+from checks import CheckResult
+from streaming import fetch_sample
+
+DEFAULT_SAMPLE_ROWS = 5
+
+
+# One aggregate expression in the table's metric SELECT; kind drives how the value is decoded
+@dataclass
+class Metric:
+    expr: str
+    kind: str = "number"
+
+
+ROW_COUNT = Metric("COUNT(*)")
+
+
+# Result of evaluating one rule against the table's metrics
+@dataclass
+class RuleResult:
+    rule: str
+    passed: bool
+    observed: object
+    message: str
+
+
+# Base rule: declares the metrics it needs and judges the observed value against min/max bounds
+class Rule:
+    type = None
+    # Time-dependent rules can change outcome without the table changing, so they are never cached
+    time_dependent = False
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.min = spec.get("min")
+        self.max = spec.get("max")
+
+    def metrics(self, backend):
+        raise NotImplementedError
+
+    def observe(self, values):
+        raise NotImplementedError
+
+    # Query returning the offending rows when the rule fails, or None for table-level rules
+    def violations(self, source, backend):
+        return None
+
+    def describe(self):
+        return self.type
+
+    # Same as observe() over pyarrow arrays holding one value per table (see arrow_eval.py)
+    def observe_arrow(self, pc, values):
+        raise NotImplementedError
+
+    def judge(self, observed):
+        return (observed is not None
+                and (self.min is None or observed >= self.min)
+                and (self.max is None or observed <= self.max))
+
+    # Result for an observed value whose outcome was decided by judge() or its vectorized equivalent
+    def result(self, observed, passed):
+        name = self.describe()
+        if observed is None:
+            return RuleResult(name, False, None, f"{name}: no value to check")
+        if passed:
+            return RuleResult(name, True, observed, f"{name}: {observed:g}")
+        if self.min is not None and observed < self.min:
+            return RuleResult(name, False, observed, f"{name}: {observed:g} < min {self.min:g}")
+        return RuleResult(name, False, observed, f"{name}: {observed:g} > max {self.max:g}")
+
+    def evaluate(self, values):
+        observed = self.observe(values)
+        return self.result(observed, self.judge(observed))
+
+
+class RowCountRule(Rule):
+    type = "row_count"
+
+    def metrics(self, backend):
+        return [ROW_COUNT]
+
+    def observe(self, values):
+        return values[0]
+
+    def observe_arrow(self, pc, values):
+        return values[0]
+
+
+class NullRateRule(Rule):
+    type = "null_rate"
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.column = spec["column"]
+
+    def describe(self):
+        return f"null_rate({self.column})"
+
+    def metrics(self, backend):
+        return [ROW_COUNT, Metric(f"SUM(CASE WHEN {self.column} IS NULL THEN 1 ELSE 0 END)")]
+
+    def observe(self, values):
+        rows, nulls = values
+        return nulls / rows if rows else 0.0
+
+    def observe_arrow(self, pc, values):
+        rows, nulls = values
+        return pc.if_else(pc.equal(rows, 0), 0.0, pc.divide(nulls, rows))
+
+    def violations(self, source, backend):
+        return f"SELECT * FROM {source} WHERE {self.column} IS NULL"
+
+
+class FreshnessRule(Rule):
+    type = "freshness"
+    time_dependent = True
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.column = spec["column"]
+        self.max = spec.get("max_age_hours", self.max)
+
+    def describe(self):
+        return f"freshness_hours({self.column})"
+
+    def metrics(self, backend):
+        return [Metric(f"MAX({self.column})", "timestamp")]
+
+    def observe(self, values):
+        latest = values[0]
+        if latest is None:
+            return None
+        return (datetime.now(timezone.utc) - latest).total_seconds() / 3600
+
+    def observe_arrow(self, pc, values):
+        # Arrow timestamps are decoded as naive UTC
+        age = pc.subtract(datetime.now(timezone.utc).replace(tzinfo=None), values[0])
+        return pc.divide(pc.cast(pc.cast(age, "duration[us]"), "int64"), 3600 * 1e6)
+
+
+class UniqueRule(Rule):
+    type = "unique"
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.columns = spec.get("columns") or [spec["column"]]
+        # Observed value is the number of duplicate keys
+        self.max = spec.get("max_duplicates", 0)
+
+    def describe(self):
+        return f"duplicates({', '.join(self.columns)})"
+
+    def metrics(self, backend):
+        return [
+            Metric(f"SUM(CASE WHEN {backend.non_null(self.columns)} THEN 1 ELSE 0 END)"),
+            Metric(backend.count_distinct(self.columns))
+        ]
+
+    def observe(self, values):
+        keys, distinct = values
+        return (keys or 0) - (distinct or 0)
+
+    def observe_arrow(self, pc, values):
+        keys, distinct = values
+        return pc.subtract(pc.fill_null(keys, 0.0), pc.fill_null(distinct, 0.0))
+
+    def violations(self, source, backend):
+        key = ", ".join(self.columns)
+        return (f"SELECT {key}, COUNT(*) AS occurrences FROM {source} WHERE {backend.non_null(self.columns)} "
+                f"GROUP BY {key} HAVING COUNT(*) > 1")
+
+
+RULES = {rule.type: rule for rule in (RowCountRule, NullRateRule, FreshnessRule, UniqueRule)}
+
+
+# Decode a raw metric value: counts may arrive as strings/decimals, timestamps as strings on SQLite
+def decode(value, kind):
+    if value is None:
+        return None
+    if kind == "timestamp":
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        elif isinstance(value, date) and not isinstance(value, datetime):
+            value = datetime(value.year, value.month, value.day)
+        # Warehouse timestamps without zone are UTC session time
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return float(value)
+
+
+# All rules for one table, sharing a single deduplicated metric SELECT over `source` (the table by default).
+# Plain plans ("probe" or "count") stand in for a rules-free non-empty check and report like check_table.
+class TablePlan:
+    def __init__(self, table, rules, backend, source=None, plain=None, sample_rows=DEFAULT_SAMPLE_ROWS):
+        self.table = table
+        self.rules = rules
+        self.source = source or table
+        self.plain = plain
+        self.sample_rows = sample_rows
+        self.backend = backend
+        # Human-readable partition scope when the source is restricted (see restrict())
+        self.scope = None
+        self.metrics = []
+        # Per rule, the positions of its metrics in self.metrics
+        self.slots = []
+        for rule in rules:
+            slots = []
+            for metric in rule.metrics(backend):
+                if metric not in self.metrics:
+                    self.metrics.append(metric)
+                slots.append(self.metrics.index(metric))
+            self.slots.append(slots)
+
+    @property
+    def cacheable(self):
+        return not any(rule.time_dependent for rule in self.rules)
+
+    # Evaluate the rules over the rows matching `scope.where` only (a partitions.PartitionScope)
+    def restrict(self, scope):
+        self.source = f"(SELECT * FROM {self.table} WHERE {scope.where}) scoped"
+        self.scope = scope.description
+        return self
+
+    def sql(self):
+        columns = ", ".join(f"{m.expr} AS m{i}" for i, m in enumerate(self.metrics))
+        return f"SELECT {columns} FROM {self.source}"
+
+    # Check definition for result caching: the metric SQL plus what judges it (rule specs, sample size)
+    def signature(self):
+        return f"{self.sql()}\n{json.dumps([rule.spec for rule in self.rules], sort_keys=True)}\n{self.sample_rows}"
+
+    # Judge a metric row; with a connection, failing row-level rules also fetch up to sample_rows offending rows
+    def evaluate(self, row, elapsed=0.0, connection=None):
+        values = [decode(value, metric.kind) for value, metric in zip(row, self.metrics)]
+        rows = int(values[self.metrics.index(ROW_COUNT)]) if ROW_COUNT in self.metrics else None
+        results = None
+        if not self.plain:
+            results = [rule.evaluate([values[i] for i in slots]) for rule, slots in zip(self.rules, self.slots)]
+        return self.summarize(rows, results, elapsed, connection)
+
+    # Table-level CheckResult from the row count and the rule results (unused for plain plans)
+    def summarize(self, rows, results, elapsed=0.0, connection=None):
+        scope = f" in {self.scope}" if self.scope else ""
+        if self.plain:
+            count = rows if self.plain == "count" else None
+            if not rows and scope:
+                return CheckResult(self.table, False, f"Table {self.table} has no rows{scope}.", count, elapsed)
+            if not rows:
+                return CheckResult(self.table, False, f"Table {self.table} exists but is empty.", count, elapsed)
+            if count is None:
+                return CheckResult(self.table, True, f"Table {self.table} is not empty{scope}.", elapsed=elapsed)
+            return CheckResult(self.table, True, f"Table {self.table} has {count} rows{scope}.", count, elapsed)
+
+        failed = [r for r in results if not r.passed]
+        details = []
+        for rule, result in zip(self.rules, results):
+            details.append(result.message)
+            if not result.passed and connection is not None:
+                details += self._offending_rows(connection, rule)
+        if failed:
+            message = f"Table {self.table} failed {len(failed)} of {len(results)} rules{scope}."
+        else:
+            message = f"Table {self.table} passed {len(results)} rules{scope}."
+        return CheckResult(self.table, not failed, message, rows, elapsed, details=details)
+
+    def _offending_rows(self, connection, rule):
+        sql = rule.violations(self.source, self.backend)
+        if sql is None or self.sample_rows <= 0:
+            return []
+        try:
+            sample, _ = fetch_sample(connection, f"{sql} LIMIT {self.sample_rows}", self.sample_rows)
+        except Exception as e:
+            return [f"  could not fetch offending rows: {e}"]
+        return [f"  offending: {tuple(row)}" for row in sample]
+
+
+def build_rule(spec):
+    if spec.get("type") not in RULES:
+        raise ValueError(f"Unknown rule type '{spec.get('type')}', expected one of: {', '.join(RULES)}.")
+    return RULES[spec["type"]](spec)
+
+
+# Read a rules file; tables may also carry non-rule settings (e.g. "profile") used by other checks
+def load_config(path):
+    with open(path) as f:
+        if path.endswith((".yml", ".yaml")):
+            import yaml
+            return yaml.safe_load(f) or {}
+        return json.load(f)
+
+
+# {table: TablePlan} for tables with rules; tables without a row_count rule still have to be non-empty
+def load_rules(config, backend, sample_rows=DEFAULT_SAMPLE_ROWS):
+    plans = {}
+    for table, table_config in (config.get("tables") or {}).items():
+        if "rules" not in table_config:
+            continue
+        rules = [build_rule(spec) for spec in table_config["rules"]]
+        if not any(isinstance(rule, RowCountRule) for rule in rules):
+            rules.insert(0, RowCountRule({"min": 1}))
+        plans[table] = TablePlan(table, rules, backend, sample_rows=sample_rows)
+    return plans
+
+
+# Run all of a table's rules in one scan
+def check_rules(connection, plan):
+    started = time.monotonic()
+    try:
+        with closing(connection.cursor()) as cursor:
+            cursor.execute(plan.sql())
+            row = cursor.fetchone()
+        return plan.evaluate(row, time.monotonic() - started, connection)
+    except Exception as e:
+        return CheckResult(plan.table, False, f"Smoke test failed: {e}", elapsed=time.monotonic() - started)
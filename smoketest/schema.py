@@ -0,0 +1,109 @@
+# smoketest/schema.py
+# Purpose: Schema-drift detection - one metadata query for all tables, fingerprinted and compared to a stored baseline
+#
+# Only tables whose fingerprint differs from the baseline get a column-by-column diff (dropped, added,
+# retyped or reordered columns). New tables are recorded on first sight; drifted baselines are only
+# replaced when SMOKE_TEST_SCHEMA_UPDATE=1 accepts the new schema.
+
+import hashlib
+import json
+import os
+import time
+from contextlib import closing
+
+from checks import CheckResult
+
+DEFAULT_BASELINE_PATH = ".smoke-schemas.json"
+
+
+# Stable hash of the ordered (column, type) list; column names compare case-insensitively
+def fingerprint(columns):
+    normalized = [[name.lower(), data_type.upper()] for name, data_type in columns]
+    return hashlib.sha256(json.dumps(normalized).encode()).hexdigest()[:16]
+
+
+# Human-readable differences between a baseline and the current column list
+def diff_schema(baseline, current):
+    before = {name.lower(): (name, data_type) for name, data_type in baseline}
+    after = {name.lower(): (name, data_type) for name, data_type in current}
+    changes = []
+    for key, (name, data_type) in before.items():
+        if key not in after:
+            changes.append(f"dropped column {name} ({data_type})")
+        elif after[key][1].upper() != data_type.upper():
+            changes.append(f"retyped column {name}: {data_type} -> {after[key][1]}")
+    for key, (name, data_type) in after.items():
+        if key not in before:
+            changes.append(f"added column {name} ({data_type})")
+    kept_before = [key for key in before if key in after]
+    kept_after = [key for key in after if key in before]
+    if kept_before != kept_after:
+        changes.append("column order changed")
+    return changes
+
+
+# JSON file of {table: {"fingerprint", "columns", "updated_at"}}
+class SchemaBaseline:
+    def __init__(self, path=DEFAULT_BASELINE_PATH):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.entries = json.load(f)
+
+    def get(self, table_name):
+        return self.entries.get(table_name)
+
+    def record(self, table_name, columns):
+        self.entries[table_name] = {
+            "fingerprint": fingerprint(columns),
+            "columns": [list(column) for column in columns],
+            "updated_at": time.time()
+        }
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+# One schema CheckResult per table, labelled "<table> [schema]", from a single metadata query
+def check_schemas(connection, backend, tables, baseline, update=False):
+    started = time.monotonic()
+    try:
+        with closing(connection.cursor()) as cursor:
+            schemas = backend.fetch_schemas(cursor, tables)
+    except Exception as e:
+        elapsed = time.monotonic() - started
+        return [CheckResult(f"{table} [schema]", False, f"Schema check failed: {e}", elapsed=elapsed)
+                for table in tables]
+
+    elapsed = time.monotonic() - started
+    results = []
+    for table in tables:
+        label = f"{table} [schema]"
+        columns = schemas.get(table)
+        if not columns:
+            results.append(CheckResult(label, False, f"Table {table} has no columns in the catalog.",
+                                       elapsed=elapsed))
+            continue
+        current = fingerprint(columns)
+        stored = baseline.get(table)
+        if stored is None:
+            baseline.record(table, columns)
+            results.append(CheckResult(label, True, f"Schema baseline recorded ({len(columns)} columns, {current}).",
+                                       elapsed=elapsed))
+        elif stored["fingerprint"] == current:
+            results.append(CheckResult(label, True, f"Schema unchanged ({current}).", elapsed=elapsed))
+        else:
+            changes = diff_schema([tuple(c) for c in stored["columns"]], columns)
+            if update:
+                baseline.record(table, columns)
+                results.append(CheckResult(label, True, f"Schema changed, baseline updated ({current}).",
+                                           elapsed=elapsed, details=changes))
+            else:
+                results.append(CheckResult(label, False, f"Schema drifted from baseline "
+                                           f"({stored['fingerprint']} -> {current}).",
+                                           elapsed=elapsed, details=changes))
+    return results
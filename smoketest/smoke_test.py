@@ -1,32 +1,308 @@
 # smoketest/smoke_test.py
-# Purpose: Smoke Test Script - Validates presence and content of a specified Databricks table using OIDC credentials
+# Purpose: Smoke Test Script - Validates presence and content of Databricks (or local stand-in) tables
 
 import os
 import sys
-from databricks import sql
-
-table_name = os.getenv("SMOKE_TEST_TABLE")
-server_hostname = os.getenv("DATABRICKS_HOST_DEV")
-http_path = os.getenv("DATABRICKS_SQL_HTTP_PATH")
-access_token = os.getenv("DATABRICKS_TOKEN")
-
-if not all([table_name, server_hostname, http_path, access_token]):
-    print("Missing environment variables for Databricks connection or table name.")
-    sys.exit(1)
-
-try:
-    with sql.connect(
-        server_hostname=server_hostname,
-        http_path=http_path,
-        access_token=access_token
-    ) as connection:
-        with connection.cursor() as cursor:
-            cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-            count = cursor.fetchone()[0]
-            if count < 1:
-                print(f"Table {table_name} exists but is empty.")
-                sys.exit(1)
-            print(f"Smoke test passed: Table {table_name} has {count} rows.")
-except Exception as e:
-    print(f"Smoke test failed: {e}")
-    sys.exit(1)
+from concurrent.futures import ThreadPoolExecutor
+
+from async_runner import DEFAULT_CHECK_TIMEOUT, DEFAULT_TOTAL_TIMEOUT, run_checks_async
+from backends import get_backend
+from cache import DEFAULT_MAX_ENTRIES, DEFAULT_TTL, ResultCache, fetch_versions
+from checks import DEFAULT_MODE, MODES, CheckResult, check_table
+from compare import DEFAULT_BUCKETS, DEFAULT_LEAF_ROWS, TargetComparison
+from connection_pool import DEFAULT_IDLE_TIMEOUT, ConnectionPool
+from local_files import check_local_files
+from partitions import resolve_scopes
+from planner import DEFAULT_BATCH_SIZE, Batch, check_batch, mode_plan, plan_batches
+from profiling import DEFAULT_SAMPLE_PERCENT, Profiler
+from retry import (DEFAULT_ATTEMPTS, DEFAULT_BASE_DELAY, DEFAULT_CIRCUIT_THRESHOLD, DEFAULT_WARMUP_TIMEOUT,
+                   CircuitBreaker, Retrier, RetryPolicy, warm_up)
+from rules import DEFAULT_SAMPLE_ROWS, check_rules, load_config, load_rules
+from schema import SchemaBaseline, check_schemas
+from timing import TimingRecorder
+from watermark import DEFAULT_STATE_PATH, IncrementalCheck, WatermarkStore
+
+DEFAULT_WORKERS = 8
+RUNNERS = ("threads", "async")
+# Table check modes plus "profile" for sampled statistics and "incremental" for new data since the last watermark
+CHECK_MODES = MODES + ("profile", "incremental")
+# Modes answered per table by their own checker rather than batched mode plans
+UNBATCHED_MODES = ("profile", "incremental")
+
+
+# Collect table names from SMOKE_TEST_TABLES / SMOKE_TEST_TABLE and an optional manifest file
+def load_tables():
+    names = (os.getenv("SMOKE_TEST_TABLES") or os.getenv("SMOKE_TEST_TABLE") or "").split(",")
+
+    manifest = os.getenv("SMOKE_TEST_MANIFEST")
+    if manifest:
+        with open(manifest) as f:
+            for line in f:
+                # One table per line, '#' starts a comment
+                names.append(line.split("#", 1)[0])
+
+    tables = []
+    for name in names:
+        name = name.strip()
+        if name and name not in tables:
+            tables.append(name)
+    return tables
+
+
+# Tables with rules run their aggregated rule query, the rest get the mode's check;
+# batches answer all of their tables in one statement
+def make_check(mode=DEFAULT_MODE, plans=None, profiler=None, incremental=None):
+    plans = {} if plans is None else plans
+
+    def check(connection, item):
+        if isinstance(item, Batch):
+            return check_batch(connection, item)
+        if item in plans:
+            return check_rules(connection, plans[item])
+        if mode == "profile":
+            return profiler.check(connection, item)
+        if mode == "incremental":
+            return incremental.check(connection, item)
+        return check_table(connection, item, mode)
+    return check
+
+
+# Partition scope spec per table: the rules file's "partitions" setting, else the SMOKE_TEST_PARTITION*
+# defaults. Tables without rules are only scoped in the plain check modes.
+def partition_specs(tables, table_config, plans, mode):
+    default = {
+        "column": os.getenv("SMOKE_TEST_PARTITION_COLUMN"),
+        "latest": os.getenv("SMOKE_TEST_PARTITIONS"),
+        "since": os.getenv("SMOKE_TEST_PARTITION_SINCE"),
+        "until": os.getenv("SMOKE_TEST_PARTITION_UNTIL")
+    }
+    default = {key: value for key, value in default.items() if value}
+    if not default.keys() & {"latest", "since", "until"}:
+        default = None
+    specs = {}
+    for table in tables:
+        spec = (table_config.get(table) or {}).get("partitions") or default
+        if spec and (table in plans or mode in MODES):
+            specs[table] = spec
+    return specs
+
+
+# Work items: one per table, or batches of up to `batch_size` tables per UNION ALL statement
+def plan_items(tables, mode, plans, backend, batch_size=DEFAULT_BATCH_SIZE, arrow=False):
+    if batch_size <= 1 or mode in UNBATCHED_MODES:
+        return tables
+    table_plans = [plans.get(table) or mode_plan(table, mode, backend) for table in tables]
+    return plan_batches(table_plans, batch_size, backend, arrow)
+
+
+# Run check(connection, item) for every table or batch over a bounded pool of worker threads sharing pooled connections;
+# a check whose connection lost its session is re-run up to `reconnects` times on a fresh one
+def run_checks(items, pool, workers, check, reconnects=0):
+    def run_one(item):
+        for attempt in range(reconnects + 1):
+            try:
+                with pool.connection() as connection:
+                    result = check(connection, item)
+            except Exception as e:
+                return check_failed(item, e)
+            if not getattr(connection, "broken", False):
+                break
+        return result if isinstance(result, list) else [result]
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(items)))) as executor:
+        return [result for results in executor.map(run_one, items) for result in results]
+
+
+def check_failed(item, error):
+    return [CheckResult(table_name, False, f"Smoke test failed: {error}")
+            for table_name in getattr(item, "tables", [item])]
+
+
+# Print one line per table, any extra notes and the totals; returns the process exit code
+def report(results, notes=()):
+    for result in results:
+        status = "PASS" if result.passed else "FAIL"
+        print(f"[{status}] {result.table} ({result.elapsed:.2f}s): {result.message}")
+        for detail in result.details:
+            print(f"    {detail}")
+
+    failed = [r for r in results if not r.passed]
+    timed_out = [r.table for r in results if r.timed_out]
+    if timed_out:
+        print(f"Timed out: {', '.join(timed_out)}")
+    for note in notes:
+        print(note)
+    print(f"Smoke test summary: {len(results) - len(failed)} passed, {len(failed)} failed, {len(results)} total.")
+    return 1 if failed else 0
+
+
+def main():
+    local_dir = os.getenv("SMOKE_TEST_LOCAL_DIR")
+    if local_dir:
+        # Offline validation of local extracts; no warehouse connection is needed
+        if not os.path.isdir(local_dir):
+            print(f"SMOKE_TEST_LOCAL_DIR '{local_dir}' is not a directory.")
+            return 1
+        results = check_local_files(local_dir, int(os.getenv("SMOKE_TEST_PROCESSES", 0)) or None)
+        if not results:
+            print(f"No .csv or .parquet extracts found in SMOKE_TEST_LOCAL_DIR '{local_dir}'.")
+            return 1
+        return report(results)
+
+    tables = load_tables()
+    try:
+        backend = get_backend()
+        rules_path = os.getenv("SMOKE_TEST_RULES")
+        config = load_config(rules_path) if rules_path else {}
+        plans = load_rules(config, backend, int(os.getenv("SMOKE_TEST_OFFENDING_ROWS", DEFAULT_SAMPLE_ROWS)))
+    except (ValueError, KeyError, OSError, ImportError) as e:
+        print(f"Invalid smoke test configuration: {e}")
+        return 1
+    tables += [table for table in config.get("tables") or {} if table not in tables]
+
+    missing = backend.missing_settings()
+    if missing or not tables:
+        print(f"Missing environment variables for {backend.name} connection or table name: "
+              f"{', '.join(missing or ['SMOKE_TEST_TABLES'])}.")
+        return 1
+
+    policy = RetryPolicy(attempts=int(os.getenv("SMOKE_TEST_RETRIES", DEFAULT_ATTEMPTS)),
+                         base_delay=float(os.getenv("SMOKE_TEST_RETRY_BASE_DELAY", DEFAULT_BASE_DELAY)))
+    retrier = Retrier(policy, CircuitBreaker(int(os.getenv("SMOKE_TEST_CIRCUIT_THRESHOLD", DEFAULT_CIRCUIT_THRESHOLD))))
+    warmup_timeout = float(os.getenv("SMOKE_TEST_WARMUP_TIMEOUT", DEFAULT_WARMUP_TIMEOUT))
+
+    compare = os.getenv("SMOKE_TEST_COMPARE")
+    if compare:
+        # "source:target", e.g. "qa:prod": compare the tables between two bundle targets instead of checking them
+        source, _, target = compare.partition(":")
+        comparison = TargetComparison(backend, source, target or "prod",
+                                      buckets=int(os.getenv("SMOKE_TEST_COMPARE_BUCKETS", DEFAULT_BUCKETS)),
+                                      sample_rows=int(os.getenv("SMOKE_TEST_OFFENDING_ROWS", DEFAULT_SAMPLE_ROWS)),
+                                      leaf_rows=int(os.getenv("SMOKE_TEST_COMPARE_LEAF_ROWS", DEFAULT_LEAF_ROWS)),
+                                      retrier=retrier, warmup_timeout=warmup_timeout)
+        specs = {table: c["compare"] for table, c in (config.get("tables") or {}).items() if "compare" in c}
+        results = comparison.run(tables, specs)
+        return report(results, [retrier.summary()] if retrier.retries or retrier.breaker.trips else [])
+
+    mode = os.getenv("SMOKE_TEST_MODE", DEFAULT_MODE)
+    if mode not in CHECK_MODES:
+        print(f"Unknown SMOKE_TEST_MODE '{mode}', expected one of: {', '.join(CHECK_MODES)}.")
+        return 1
+    runner = os.getenv("SMOKE_TEST_RUNNER", "threads")
+    if runner not in RUNNERS:
+        print(f"Unknown SMOKE_TEST_RUNNER '{runner}', expected one of: {', '.join(RUNNERS)}.")
+        return 1
+
+    workers = int(os.getenv("SMOKE_TEST_WORKERS", DEFAULT_WORKERS))
+    pool_size = int(os.getenv("SMOKE_TEST_POOL_SIZE", workers))
+    idle_timeout = float(os.getenv("SMOKE_TEST_POOL_IDLE_TIMEOUT", DEFAULT_IDLE_TIMEOUT))
+    batch_size = int(os.getenv("SMOKE_TEST_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+    cache_path = os.getenv("SMOKE_TEST_CACHE")
+    cache = ResultCache(
+        cache_path,
+        ttl=float(os.getenv("SMOKE_TEST_CACHE_TTL", DEFAULT_TTL)),
+        max_entries=int(os.getenv("SMOKE_TEST_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+    ) if cache_path else None
+    table_config = config.get("tables") or {}
+    profiler = Profiler(
+        backend,
+        percent=float(os.getenv("SMOKE_TEST_SAMPLE_PERCENT", DEFAULT_SAMPLE_PERCENT)),
+        rows=int(os.getenv("SMOKE_TEST_SAMPLE_ROWS", 0)) or None,
+        overrides={table: c["profile"] for table, c in table_config.items() if "profile" in c}
+    )
+    watermarks = WatermarkStore(os.getenv("SMOKE_TEST_WATERMARK_STATE", DEFAULT_STATE_PATH)) \
+        if mode == "incremental" else None
+    incremental = IncrementalCheck(
+        backend, watermarks,
+        columns={table: c["watermark"]["column"] for table, c in table_config.items() if "watermark" in c},
+        default_column=os.getenv("SMOKE_TEST_WATERMARK_COLUMN")
+    )
+    check = make_check(mode, plans, profiler, incremental)
+    timings_sink = os.getenv("SMOKE_TEST_TIMINGS")
+    recorder = TimingRecorder(timings_sink) if timings_sink else None
+    if recorder:
+        check = recorder.wrap_check(check)
+    notes = []
+    if warmup_timeout > 0:
+        # Pay a warehouse cold start once, before any check's clock starts
+        try:
+            waited = warm_up(backend.connect, warmup_timeout, policy)
+        except Exception as e:
+            print(f"Warehouse not ready after warm-up: {e}")
+            return 1
+        if waited >= 1:
+            notes.append(f"Warm-up: warehouse ready after {waited:.1f}s.")
+
+    stragglers = []
+    specs = partition_specs(tables, table_config, plans, mode)
+    baseline_path = os.getenv("SMOKE_TEST_SCHEMA_BASELINE")
+    schema_results = []
+    with ConnectionPool(retrier.wrap_connect(backend.connect), size=pool_size, idle_timeout=idle_timeout) as pool:
+        if baseline_path:
+            # Column metadata for every table in one query, diffed only where fingerprints changed
+            baseline = SchemaBaseline(baseline_path)
+            with pool.connection() as connection:
+                schema_results = check_schemas(connection, backend, tables, baseline,
+                                               update=os.getenv("SMOKE_TEST_SCHEMA_UPDATE") == "1")
+            baseline.save()
+
+        # Scoped tables read only their selected partitions, through a rule plan or a scoped mode plan
+        for table, scope in resolve_scopes(specs, pool, backend, workers).items():
+            if table in plans:
+                plans[table].restrict(scope)
+            else:
+                plans[table] = mode_plan(table, mode, backend, scope)
+
+        cached, keys, versions = {}, {}, {}
+        # Incremental results depend on the stored watermark, not only on the table version
+        if cache and mode != "incremental":
+            versions = fetch_versions(tables, pool, backend, workers)
+            for table in tables:
+                plan = plans.get(table)
+                if plan is None or plan.cacheable:
+                    keys[table] = ResultCache.key(backend, table, plan.signature() if plan else f"mode:{mode}")
+                    hit = cache.get(keys[table], versions[table])
+                    if hit:
+                        cached[table] = hit
+
+        arrow = os.getenv("SMOKE_TEST_ARROW", "0") == "1"
+        items = plan_items([t for t in tables if t not in cached], mode, plans, backend, batch_size, arrow)
+        check_pool = recorder.wrap_pool(pool) if recorder else pool
+        results = []
+        if items and runner == "threads":
+            results = run_checks(items, check_pool, workers, check, reconnects=policy.attempts - 1)
+        elif items:
+            run = run_checks_async(
+                items, check_pool, workers, check,
+                check_timeout=float(os.getenv("SMOKE_TEST_CHECK_TIMEOUT", DEFAULT_CHECK_TIMEOUT)),
+                total_timeout=float(os.getenv("SMOKE_TEST_TIMEOUT", DEFAULT_TOTAL_TIMEOUT)),
+                reconnects=policy.attempts - 1
+            )
+            results, stragglers = run.results, run.stragglers
+
+    if retrier.retries or retrier.breaker.trips:
+        notes.append(retrier.summary())
+    if cache:
+        for result in results:
+            if result.table in keys:
+                cache.put(keys[result.table], versions[result.table], result)
+        cache.save()
+        notes.append(cache.summary())
+    if recorder:
+        notes.append(recorder.close())
+
+    by_table = {result.table: result for result in results}
+    by_table.update(cached)
+    code = report([by_table[table] for table in tables] + schema_results, notes)
+    if watermarks and code == 0:
+        # Watermarks only move forward after a fully successful run
+        watermarks.save()
+    if stragglers:
+        # Worker threads stuck in a statement the driver could not cancel would block interpreter exit
+        print(f"Abandoning checks still blocked after cancellation: {', '.join(stragglers)}")
+        sys.stdout.flush()
+        os._exit(code)
+    return code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+# smoketest/streaming.py
+# Purpose: Bounded-memory result streaming - fetchmany / Arrow batch generators and capped row samples
+
+from contextlib import closing
+
+DEFAULT_BATCH_ROWS = 10000
+
+
+# Yield lists of row tuples, holding at most one batch in memory
+def iter_batches(cursor, batch_rows=DEFAULT_BATCH_ROWS):
+    while True:
+        batch = cursor.fetchmany(batch_rows)
+        if not batch:
+            return
+        yield batch
+
+
+def iter_rows(cursor, batch_rows=DEFAULT_BATCH_ROWS):
+    for batch in iter_batches(cursor, batch_rows):
+        yield from batch
+
+
+# Yield batches as lists of columns; uses Arrow record batches when the cursor offers them
+# (databricks-sql-connector's fetchmany_arrow) so no per-row tuples are built
+def iter_column_batches(cursor, batch_rows=DEFAULT_BATCH_ROWS):
+    if hasattr(cursor, "fetchmany_arrow"):
+        while True:
+            table = cursor.fetchmany_arrow(batch_rows)
+            if table.num_rows == 0:
+                return
+            yield [column.to_pylist() for column in table.columns]
+    else:
+        for batch in iter_batches(cursor, batch_rows):
+            yield [list(column) for column in zip(*batch)]
+
+
+# Keep the first `cap` rows of a row stream and count the rest without retaining them
+def bounded_sample(rows, cap):
+    sample = []
+    total = 0
+    for row in rows:
+        if len(sample) < cap:
+            sample.append(row)
+        total += 1
+    return sample, total
+
+
+# Run `sql` and return (first `cap` rows, rows streamed) in constant memory
+def fetch_sample(connection, sql, cap, batch_rows=DEFAULT_BATCH_ROWS):
+    with closing(connection.cursor()) as cursor:
+        cursor.execute(sql)
+        return bounded_sample(iter_rows(cursor, batch_rows), cap)
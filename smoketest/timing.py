@@ -0,0 +1,150 @@
+# smoketest/timing.py
+# Purpose: Per-check phase timings (connect, execute, fetch, total) emitted as JSON lines with batch percentiles
+
+import json
+import math
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+PHASES = ("connect", "execute", "fetch", "total")
+PERCENTILES = (50, 95, 99)
+FETCH_METHODS = ("fetchone", "fetchmany", "fetchall", "fetchall_arrow", "fetchmany_arrow",
+                 "to_arrow_table", "fetch_arrow_table")
+
+
+# Nearest-rank percentile of an unsorted list
+def percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+# Cursor proxy adding execute/fetch time to the owning check's phases
+class TimedCursor:
+    def __init__(self, cursor, phases):
+        self._cursor = cursor
+        self._phases = phases
+
+    def execute(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(*args, **kwargs)
+        finally:
+            self._phases["execute"] += time.perf_counter() - started
+
+    def __getattr__(self, name):
+        attr = getattr(self._cursor, name)
+        if name not in FETCH_METHODS:
+            return attr
+
+        def timed_fetch(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                self._phases["fetch"] += time.perf_counter() - started
+        return timed_fetch
+
+
+class TimedConnection:
+    def __init__(self, connection, phases):
+        self._connection = connection
+        self._phases = phases
+
+    def cursor(self, *args, **kwargs):
+        return TimedCursor(self._connection.cursor(*args, **kwargs), self._phases)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+# Pool proxy recording how long each checkout took; the value is read back by the check on the same thread
+class TimedPool:
+    def __init__(self, pool, recorder):
+        self._pool = pool
+        self._recorder = recorder
+
+    def acquire(self, timeout=None):
+        started = time.perf_counter()
+        connection = self._pool.acquire(timeout)
+        self._recorder._local.connect = time.perf_counter() - started
+        return connection
+
+    def release(self, connection, discard=False):
+        self._pool.release(connection, discard)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        connection = self.acquire(timeout)
+        try:
+            yield connection
+        except BaseException:
+            self.release(connection, discard=True)
+            raise
+        self.release(connection)
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
+
+
+# Collects one record per check, streaming JSON lines to `sink` (a path, or "-" for stdout)
+class TimingRecorder:
+    def __init__(self, sink="-"):
+        self.records = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._owns_stream = sink != "-"
+        self._stream = open(sink, "w") if self._owns_stream else sys.stdout
+
+    def wrap_pool(self, pool):
+        return TimedPool(pool, self)
+
+    # Wrap a check(connection, item) callable so every call is timed and recorded
+    def wrap_check(self, check):
+        def timed_check(connection, item):
+            phases = {"connect": getattr(self._local, "connect", 0.0), "execute": 0.0, "fetch": 0.0}
+            self._local.connect = 0.0
+            started = time.perf_counter()
+            try:
+                result = check(TimedConnection(connection, phases), item)
+            finally:
+                phases["total"] = phases["connect"] + time.perf_counter() - started
+            results = result if isinstance(result, list) else [result]
+            self.record({
+                "item": str(item),
+                "tables": [r.table for r in results],
+                "passed": all(r.passed for r in results),
+                **{phase: round(phases[phase], 6) for phase in PHASES}
+            })
+            return result
+        return timed_check
+
+    def record(self, record):
+        with self._lock:
+            self.records.append(record)
+            self._stream.write(json.dumps(record) + "\n")
+            self._stream.flush()
+
+    # {phase: {"p50": s, "p95": s, "p99": s}} across all recorded checks
+    def percentiles(self):
+        return {
+            phase: {f"p{p}": percentile([r[phase] for r in self.records], p) for p in PERCENTILES}
+            for phase in PHASES
+        }
+
+    # Write the percentile summary record, close the sink and return a human-readable line
+    def close(self):
+        summary = self.percentiles()
+        with self._lock:
+            self._stream.write(json.dumps({"summary": summary, "checks": len(self.records)}) + "\n")
+            if self._owns_stream:
+                self._stream.close()
+            else:
+                self._stream.flush()
+        total = summary["total"]
+        if not self.records:
+            return "Timing: no checks recorded."
+        return "Timing (total): " + ", ".join(f"{k} {v * 1000:.1f}ms" for k, v in total.items()) + "."
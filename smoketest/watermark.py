@@ -0,0 +1,125 @@
+# smoketest/watermark.py
+# Purpose: Incremental freshness checks - verify new data arrived since the last successful run using per-table watermarks
+#
+# A table's watermark is the MAX of its ingestion column (or, without one, the table version, i.e. the
+# Delta commit on Databricks). Checks read only `WHERE column > :watermark`, so partition and file pruning
+# keep the scan to newly arrived data. Watermarks advance only when the whole run passes.
+
+import json
+import os
+import threading
+import time
+from contextlib import closing
+from datetime import date, datetime
+
+from checks import CheckResult
+
+DEFAULT_STATE_PATH = ".smoke-watermarks.json"
+
+
+# JSON-safe form of a watermark value; timestamps keep their type so they are bound back as timestamps
+def encode(value):
+    if isinstance(value, datetime):
+        return {"kind": "timestamp", "value": value.isoformat()}
+    if isinstance(value, date):
+        return {"kind": "date", "value": value.isoformat()}
+    return {"kind": "value", "value": value}
+
+
+def decode(entry):
+    if entry["kind"] == "timestamp":
+        return datetime.fromisoformat(entry["value"])
+    if entry["kind"] == "date":
+        return date.fromisoformat(entry["value"])
+    return entry["value"]
+
+
+# JSON file of {table: {"column", "kind", "value", "updated_at"}}; new watermarks are staged by the
+# checks and only written by save()
+class WatermarkStore:
+    def __init__(self, path=DEFAULT_STATE_PATH):
+        self.path = path
+        self.entries = {}
+        self.staged = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path) as f:
+                self.entries = json.load(f)
+
+    # (column, value) of the last committed watermark, or None before the first successful run
+    def get(self, table_name):
+        entry = self.entries.get(table_name)
+        if entry is None:
+            return None
+        return entry.get("column"), decode(entry)
+
+    def stage(self, table_name, column, value):
+        with self._lock:
+            self.staged[table_name] = {"column": column, **encode(value), "updated_at": time.time()}
+
+    # Commit staged watermarks (all, or only those of `tables`) and write the file atomically
+    def save(self, tables=None):
+        with self._lock:
+            for table_name in list(self.staged if tables is None else tables):
+                if table_name in self.staged:
+                    self.entries[table_name] = self.staged.pop(table_name)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.entries, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+class IncrementalCheck:
+    # columns: {table: watermark column}; tables without one fall back to the table version
+    def __init__(self, backend, store, columns=None, default_column=None):
+        self.backend = backend
+        self.store = store
+        self.columns = columns or {}
+        self.default_column = default_column
+
+    def check(self, connection, table_name):
+        started = time.monotonic()
+        column = self.columns.get(table_name, self.default_column)
+        try:
+            with closing(connection.cursor()) as cursor:
+                if column:
+                    passed, message, rows = self._check_column(cursor, table_name, column)
+                else:
+                    passed, message, rows = self._check_version(cursor, table_name)
+        except Exception as e:
+            return CheckResult(table_name, False, f"Smoke test failed: {e}", elapsed=time.monotonic() - started)
+        return CheckResult(table_name, passed, message, rows, time.monotonic() - started)
+
+    def _check_column(self, cursor, table_name, column):
+        previous = self.store.get(table_name)
+        if previous is not None and previous[0] != column:
+            # Watermark column changed in the config: start over from a full scan
+            previous = None
+        sql = f"SELECT COUNT(*), MAX({column}) FROM {table_name}"
+        if previous is None:
+            cursor.execute(sql)
+        else:
+            cursor.execute(f"{sql} WHERE {column} > {self.backend.placeholder('watermark')}",
+                           {"watermark": previous[1]})
+        rows, latest = cursor.fetchone()
+
+        if not rows:
+            if previous is None:
+                return False, f"Table {table_name} exists but is empty.", 0
+            return False, f"Table {table_name} has no new rows since {column} {previous[1]}.", 0
+        self.store.stage(table_name, column, latest)
+        if previous is None:
+            return True, f"Table {table_name} has {rows} rows; watermark set to {column} {latest}.", rows
+        return True, f"Table {table_name} has {rows} new rows since {column} {previous[1]} (now {latest}).", rows
+
+    def _check_version(self, cursor, table_name):
+        version = self.backend.table_version(cursor, table_name)
+        if version is None:
+            return False, f"Table {table_name} has no watermark column and no table version.", None
+        previous = self.store.get(table_name)
+        if previous is not None and previous[0] is None and previous[1] == version:
+            return False, f"Table {table_name} is unchanged since version {version}.", None
+        self.store.stage(table_name, None, version)
+        if previous is None or previous[0] is not None:
+            return True, f"Table {table_name} is at version {version}; watermark set.", None
+        return True, f"Table {table_name} changed since version {previous[1]} (now {version}).", None
@@ -0,0 +1,64 @@
+# tests/test_cache.py
+# Purpose: Result caching (smoketest/cache.py) keyed by the full check definition
+#
+# Run with: python -m unittest discover -s tests
+
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import closing
+
+SMOKETEST = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "smoketest")
+sys.path.insert(0, SMOKETEST)
+
+from backends import SQLiteBackend  # noqa: E402
+from cache import ResultCache  # noqa: E402
+from rules import load_rules  # noqa: E402
+
+
+def rules(**row_count):
+    return {"tables": {"orders": {"rules": [dict(row_count, type="row_count")]}}}
+
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.database = os.path.join(self.directory, "warehouse.db")
+        with closing(sqlite3.connect(self.database)) as connection:
+            connection.executescript("CREATE TABLE orders (id INTEGER); INSERT INTO orders VALUES (1), (2);")
+
+    def key(self, config, sample_rows=5):
+        backend = SQLiteBackend({"SMOKE_TEST_DATABASE": self.database})
+        return ResultCache.key(backend, "orders", load_rules(config, backend, sample_rows)["orders"].signature())
+
+    def test_signature_covers_thresholds_and_sample_size(self):
+        self.assertEqual(self.key(rules(min=1)), self.key(rules(min=1)))
+        self.assertNotEqual(self.key(rules(min=1)), self.key(rules(min=1000000)))
+        self.assertNotEqual(self.key(rules(min=1)), self.key(rules(min=1), sample_rows=10))
+
+    def run_smoke_test(self, config):
+        path = os.path.join(self.directory, "rules.json")
+        with open(path, "w") as f:
+            json.dump(config, f)
+        env = dict(os.environ, SMOKE_TEST_BACKEND="sqlite", SMOKE_TEST_DATABASE=self.database,
+                   SMOKE_TEST_TABLES="orders", SMOKE_TEST_RULES=path,
+                   SMOKE_TEST_CACHE=os.path.join(self.directory, "cache.json"))
+        return subprocess.run([sys.executable, os.path.join(SMOKETEST, "smoke_test.py")], env=env,
+                              capture_output=True, text=True)
+
+    def test_tightened_threshold_misses_the_cache(self):
+        self.assertEqual(self.run_smoke_test(rules(min=1)).returncode, 0)
+        tightened = self.run_smoke_test(rules(min=1000000))
+        self.assertEqual(tightened.returncode, 1, tightened.stdout)
+        self.assertNotIn("(cached)", tightened.stdout)
+        self.assertIn("< min", tightened.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+# tests/test_cell_dag.py
+# Purpose: Dependency analysis and concurrent scheduling of notebook cells (notebooks/cell_dag.py)
+#
+# Run with: python -m unittest discover -s tests
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "notebooks"))
+
+from cell_dag import analyze, build_dag, run_dag  # noqa: E402
+
+
+def run_cells(sources, threads=4):
+    namespace = {}
+    run_dag([compile(source, f"cell{i}", "exec") for i, source in enumerate(sources)], build_dag(sources),
+            lambda code: exec(code, namespace), threads)
+    return namespace
+
+
+class CellDagTest(unittest.TestCase):
+    def test_independent_cells_have_no_edges(self):
+        self.assertEqual(build_dag(["a = 1", "b = 2", "print(a + b)"]), {0: set(), 1: set(), 2: {0, 1}})
+
+    def test_function_reads_globals_when_called(self):
+        sources = ["def f(): return x", "import time\ntime.sleep(.3); x = 1", "y = f()"]
+        self.assertIn(1, build_dag(sources)[2])
+        self.assertEqual(run_cells(sources)["y"], 1)
+
+    def test_function_reads_are_transitive(self):
+        deps = build_dag(["def g(): return x", "def f(): return g()", "x = 1", "y = f()"])
+        self.assertIn(2, deps[3])
+
+    def test_function_global_assignment_is_a_write_of_the_caller(self):
+        sources = ["def init():\n    global conn\n    conn = 1", "init()", "y = conn"]
+        self.assertIn(1, build_dag(sources)[2])
+        self.assertEqual(run_cells(sources)["y"], 1)
+
+    def test_function_mutation_is_a_write_of_the_caller(self):
+        sources = ["items = []", "def add():\n    items.append(1)", "add()", "n = len(items)"]
+        self.assertIn(2, build_dag(sources)[3])
+        self.assertEqual(run_cells(sources)["n"], 1)
+
+    def test_function_writes_are_transitive(self):
+        deps = build_dag(["d = {}", "def g():\n    d['k'] = 1", "def f(): g()", "f()", "print(d)"])
+        self.assertIn(3, deps[4])
+
+    def test_class_body_reads(self):
+        deps = build_dag(["class C:\n    def m(self): return x", "x = 1", "y = C().m()"])
+        self.assertIn(1, deps[2])
+
+    def test_locals_and_parameters_are_not_global_reads(self):
+        names = analyze("def f(a, *rest, b=None, **options):\n    q = a + y\n    return [i for i in q], rest, options")
+        self.assertEqual(names.bodies["f"], {"y"})
+
+    def test_global_declaration_is_a_global_read(self):
+        names = analyze("def f():\n    global counter\n    counter = counter + 1")
+        self.assertEqual(names.bodies["f"], {"counter"})
+        self.assertIn("counter", names.writes)
+
+    def test_method_call_on_shared_object_is_a_write(self):
+        deps = build_dag(["items = []", "items.append(1)", "print(items)"])
+        self.assertEqual(deps[2], {0, 1})
+
+    def test_barrier(self):
+        self.assertEqual(build_dag(["a = 1", None, "b = 2"]), {0: set(), 1: {0}, 2: {1}})
+
+    def test_first_failure_in_notebook_order_is_raised(self):
+        with self.assertRaises(ZeroDivisionError):
+            run_cells(["import time\ntime.sleep(.1)\n1 / 0", "[][0]"])
+
+
+if __name__ == "__main__":
+    unittest.main()
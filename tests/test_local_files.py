@@ -0,0 +1,43 @@
+# tests/test_local_files.py
+# Purpose: Offline validation of local extracts (smoketest/local_files.py)
+#
+# Run with: python -m unittest discover -s tests
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "smoketest"))
+
+from local_files import check_local_files  # noqa: E402
+
+
+class LocalFilesTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, text):
+        path = os.path.join(self.directory.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def test_bad_shard_fails_only_its_table(self):
+        self.write("orders/part-0.csv", "id,amount\n1,2\n")
+        self.write("orders/part-1.csv", "id,total\n3,4\n")
+        self.write("customers.csv", "id\n1\n2\n")
+        for processes in (1, 2):
+            results = {r.table: r for r in check_local_files(self.directory.name, processes)}
+            self.assertTrue(results["customers"].passed)
+            self.assertEqual(results["customers"].rows, 2)
+            self.assertFalse(results["orders"].passed)
+            self.assertIn("Column mismatch", results["orders"].message)
+
+    def test_empty_directory_has_no_results(self):
+        self.assertEqual(check_local_files(self.directory.name), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
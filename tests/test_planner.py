@@ -0,0 +1,93 @@
+# tests/test_planner.py
+# Purpose: Batched metric queries (smoketest/planner.py) and their Arrow evaluation (smoketest/arrow_eval.py)
+#
+# Run with: python -m unittest discover -s tests
+
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "smoketest"))
+
+import arrow_eval  # noqa: E402
+from backends import DuckDBBackend  # noqa: E402
+from planner import check_batch, plan_batches  # noqa: E402
+from rules import load_rules  # noqa: E402
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+RULES = {"tables": {
+    "events": {"rules": [{"type": "row_count", "min": 1}, {"type": "freshness", "column": "ts", "max_age_hours": 3}]},
+    "orders": {"rules": [{"type": "freshness", "column": "ts", "max_age_hours": 3},
+                         {"type": "unique", "columns": ["id"]}]}
+}}
+
+
+# Hands back the Arrow result with the first timestamp cell replaced by text Arrow cannot parse
+class GarbledBackend(DuckDBBackend):
+    def fetch_arrow(self, cursor):
+        import pyarrow as pa
+        table = super().fetch_arrow(cursor)
+        index = table.schema.get_field_index("timestamp0")
+        values = [str(v) for v in table.column(index).to_pylist()]
+        values[0] = "not a time"
+        return table.set_column(index, "timestamp0", pa.array(values))
+
+
+@unittest.skipUnless(arrow_eval.available(), "pyarrow is not installed")
+class DecodeArrayTest(unittest.TestCase):
+    def test_zone_offset_strings(self):
+        import pyarrow as pa
+        decoded = arrow_eval.decode_array(pa.array(["2024-01-01 00:00:00+00", "2024-01-01 02:00:00+02", None]),
+                                          "timestamp")
+        self.assertEqual(decoded.to_pylist(), [datetime(2024, 1, 1), datetime(2024, 1, 1), None])
+
+    def test_zone_aware_timestamps_keep_their_instant(self):
+        import pyarrow as pa
+        array = pa.array([datetime(2024, 1, 1, 5)], pa.timestamp("us", tz="UTC")).cast(
+            pa.timestamp("us", tz="America/New_York"))
+        self.assertEqual(arrow_eval.decode_array(array, "timestamp").to_pylist(), [datetime(2024, 1, 1, 5)])
+
+
+@unittest.skipUnless(arrow_eval.available() and duckdb, "pyarrow and duckdb are not installed")
+class BatchTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.database = os.path.join(directory.name, "warehouse.duckdb")
+        with duckdb.connect(self.database) as connection:
+            connection.execute("CREATE TABLE events (id INTEGER, ts TIMESTAMPTZ)")
+            connection.execute("INSERT INTO events SELECT i, now() - INTERVAL 2 HOUR FROM range(5) t(i)")
+            connection.execute("CREATE TABLE orders AS SELECT * FROM events")
+
+    def run_batch(self, backend_type=DuckDBBackend, arrow=True):
+        backend = backend_type({"SMOKE_TEST_DATABASE": self.database})
+        plans = load_rules(RULES, backend)
+        [batch] = plan_batches([plans["events"], plans["orders"]], 10, backend, arrow)
+        connection = backend.connect()
+        try:
+            return batch, check_batch(connection, batch)
+        finally:
+            connection.close()
+
+    def test_arrow_batch_selects_typed_columns(self):
+        batch, results = self.run_batch()
+        self.assertEqual(sorted({kind for _, kind in batch.columns}), ["number", "timestamp"])
+        self.assertIn("AS TIMESTAMP) AS timestamp0", batch.sql())
+        self.assertEqual([r.passed for r in results], [True, True])
+        _, tuple_results = self.run_batch(arrow=False)
+        self.assertEqual([r.message for r in results], [r.message for r in tuple_results])
+
+    def test_undecodable_metric_fails_only_its_plan(self):
+        _, results = self.run_batch(GarbledBackend)
+        self.assertEqual([r.passed for r in results], [False, True])
+        self.assertIn("not a time", results[0].message)
+
+
+if __name__ == "__main__":
+    unittest.main()
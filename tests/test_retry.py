@@ -0,0 +1,129 @@
+# tests/test_retry.py
+# Purpose: Transient-error classification and recovery (smoketest/retry.py) driven through the fault-injecting backend
+#
+# Run with: python -m unittest discover -s tests
+
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from contextlib import closing
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "smoketest"))
+
+from backends import FaultInjectingBackend, InjectedFaultError  # noqa: E402
+from checks import check_table  # noqa: E402
+from connection_pool import ConnectionPool  # noqa: E402
+from retry import CircuitBreaker, Retrier, RetryPolicy, is_connection_lost, is_transient, warm_up  # noqa: E402
+from smoke_test import run_checks  # noqa: E402
+
+
+class HttpError(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def fault_backend(database, **settings):
+    env = {"SMOKE_TEST_FAULT_BACKEND": "sqlite", "SMOKE_TEST_DATABASE": database, "SMOKE_TEST_FAULT_SEED": "7",
+           "SMOKE_TEST_FAULT_RATE": "0"}
+    env.update({f"SMOKE_TEST_FAULT_{key.upper()}": str(value) for key, value in settings.items()})
+    return FaultInjectingBackend(env)
+
+
+def retrier(attempts=6):
+    return Retrier(RetryPolicy(attempts=attempts, base_delay=0), CircuitBreaker(threshold=1000), sleep=lambda _: None)
+
+
+class ClassifierTest(unittest.TestCase):
+    def test_status_codes_need_context(self):
+        self.assertFalse(is_transient(Exception("[TABLE_OR_VIEW_NOT_FOUND] The table orders_2504 cannot be found.")))
+        self.assertFalse(is_transient(Exception("[PARSE_SYNTAX_ERROR] Syntax error at or near 'FORM' (pos 429)")))
+        self.assertFalse(is_transient(Exception("no such table: orders_5040")))
+        self.assertTrue(is_transient(Exception("Received HTTP 503 from the warehouse")))
+        self.assertTrue(is_transient(Exception("request failed with status: 429")))
+        self.assertTrue(is_transient(HttpError("rate limited", 429)))
+
+    def test_injected_faults_are_transient(self):
+        self.assertTrue(is_transient(InjectedFaultError("429 Too Many Requests: request rate limit exceeded")))
+        self.assertTrue(is_transient(InjectedFaultError(
+            "[TEMPORARILY_UNAVAILABLE] 503 Service Unavailable: warehouse is starting")))
+
+    def test_connection_lost(self):
+        self.assertTrue(is_connection_lost(ConnectionResetError("Connection reset by peer")))
+        self.assertTrue(is_connection_lost(Exception("write failed: broken pipe")))
+        self.assertFalse(is_connection_lost(ConnectionRefusedError("connection refused")))
+
+
+class FaultInjectionTest(unittest.TestCase):
+    def setUp(self):
+        handle, self.database = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        with closing(sqlite3.connect(self.database)) as connection:
+            connection.executescript("CREATE TABLE orders (id INTEGER); INSERT INTO orders VALUES (1), (2);"
+                                     "CREATE TABLE empty (id INTEGER);")
+
+    def tearDown(self):
+        os.remove(self.database)
+
+    def test_throttled_statements_are_retried(self):
+        backend = fault_backend(self.database, rate=0.4)
+        wrapped = retrier()
+        connection = wrapped.wrap_connect(backend.connect)()
+        for _ in range(30):
+            with closing(connection.cursor()) as cursor:
+                cursor.execute("SELECT COUNT(*) FROM orders")
+                self.assertEqual(cursor.fetchone()[0], 2)
+        self.assertGreater(wrapped.retries, 0)
+        self.assertEqual(wrapped.retries, backend.injected)
+        self.assertFalse(connection.broken)
+
+    def test_missing_table_is_not_retried(self):
+        wrapped = retrier()
+        connection = wrapped.wrap_connect(fault_backend(self.database).connect)()
+        with closing(connection.cursor()) as cursor:
+            with self.assertRaises(sqlite3.OperationalError):
+                cursor.execute("SELECT 1 FROM orders_5040")
+        self.assertEqual(wrapped.retries, 0)
+        self.assertEqual(wrapped.breaker.failures, 0)
+
+    def test_lost_session_is_not_retried_on_the_same_connection(self):
+        backend = fault_backend(self.database, drop_rate=1)
+        wrapped = retrier()
+        connection = wrapped.wrap_connect(backend.connect)()
+        with closing(connection.cursor()) as cursor:
+            with self.assertRaises(ConnectionResetError):
+                cursor.execute("SELECT 1")
+        self.assertTrue(connection.broken)
+        self.assertEqual((wrapped.retries, wrapped.lost, backend.injected), (0, 1, 1))
+        self.assertEqual(wrapped.breaker.failures, 0)
+
+    def test_check_reruns_on_a_fresh_connection(self):
+        backend = fault_backend(self.database)
+        wrapped = retrier()
+        connects = []
+
+        # The first connection drops its session on the first statement; later ones are healthy
+        def connect():
+            connection = backend.connect()
+            connection.dropped = not connects
+            connects.append(connection)
+            return connection
+
+        with ConnectionPool(wrapped.wrap_connect(connect), size=1) as pool:
+            results = run_checks(["orders"], pool, 1, lambda connection, table: check_table(connection, table, "probe"),
+                                 reconnects=2)
+            self.assertEqual(pool.stats["discarded"], 1)
+        self.assertEqual([r.passed for r in results], [True])
+        self.assertEqual(len(connects), 2)
+
+    def test_warm_up_waits_out_a_cold_start(self):
+        backend = fault_backend(self.database, cold_start=0.2)
+        waited = warm_up(backend.connect, timeout=5, policy=RetryPolicy(base_delay=0.05, max_delay=0.05))
+        self.assertGreaterEqual(waited, 0.15)
+        self.assertGreater(backend.injected, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+# tests/test_run_notebooks.py
+# Purpose: Local notebook runs (notebooks/run_notebooks.py) with cells on a thread pool
+#
+# Run with: python -m unittest discover -s tests
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+NOTEBOOKS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "notebooks")
+
+
+class RunNotebooksTest(unittest.TestCase):
+    # The report cell must wait for the wait cell although no name connects them
+    def test_profile_report_waits_for_earlier_cells(self):
+        with tempfile.TemporaryDirectory() as directory:
+            marker = os.path.join(directory, "_SUCCESS")
+            report = os.path.join(directory, "run.json")
+            timer = threading.Timer(0.5, lambda: open(marker, "w").close())
+            timer.start()
+            try:
+                completed = subprocess.run(
+                    [sys.executable, os.path.join(NOTEBOOKS, "run_notebooks.py"),
+                     os.path.join(NOTEBOOKS, "notebook.py"), "--param", f"wait_for_path={marker}", "--param", "wait_timeout=30", "--cell-threads", "4",
+                     "--no-cache", "--report", report], capture_output=True, text=True)
+            finally:
+                timer.cancel()
+            self.assertEqual(completed.returncode, 0, completed.stdout + completed.stderr)
+            with open(report) as f:
+                [run] = json.load(f)["notebooks"]
+        summary = run["output"].split("Ready after", 1)[1]
+        self.assertIn("notebook.py #6: Wait until the configured condition holds", summary)
+
+
+if __name__ == "__main__":
+    unittest.main()
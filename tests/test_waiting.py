@@ -0,0 +1,74 @@
+# tests/test_waiting.py
+# Purpose: Readiness polling (notebooks/waiting.py) against tables that are missing or flaky
+#
+# Run with: python -m unittest discover -s tests
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "notebooks"))
+
+from waiting import WaitTimeout, table_version_changed, wait_until  # noqa: E402
+
+
+# Stand-in SparkSession answering DESCRIBE HISTORY from a scripted list of versions or exceptions
+class HistorySession:
+    def __init__(self, *answers):
+        self.answers = list(answers)
+
+    def sql(self, query):
+        answer = self.answers.pop(0) if len(self.answers) > 1 else self.answers[0]
+        if isinstance(answer, Exception):
+            raise answer
+        return Rows([(answer,)])
+
+
+class Rows(list):
+    def collect(self):
+        return self
+
+
+def wait(condition, timeout=10):
+    clock = [0.0]
+
+    def sleep(seconds):
+        clock[0] += seconds
+    return wait_until(condition, timeout=timeout, sleep=sleep, clock=lambda: clock[0])
+
+
+class WaitingTest(unittest.TestCase):
+    def test_condition_errors_are_not_ready(self):
+        answers = [RuntimeError("warehouse busy"), None, "ready"]
+
+        def condition():
+            answer = answers.pop(0)
+            if isinstance(answer, Exception):
+                raise answer
+            return answer
+        self.assertEqual((wait(condition).value, wait(lambda: 1).polls), ("ready", 1))
+
+    def test_timeout_reports_the_last_error(self):
+        def condition():
+            raise RuntimeError("[TABLE_OR_VIEW_NOT_FOUND] main.silver.orders")
+        with self.assertRaisesRegex(WaitTimeout, "Last error: RuntimeError: .*TABLE_OR_VIEW_NOT_FOUND"):
+            wait(condition, timeout=5)
+
+    def test_missing_table_has_no_baseline(self):
+        missing = RuntimeError("[TABLE_OR_VIEW_NOT_FOUND] The table main.silver.orders cannot be found.")
+        condition = table_version_changed(HistorySession(missing, missing, 0), "main.silver.orders")
+        self.assertEqual(wait(condition).value, 0)
+
+    def test_failed_baseline_is_taken_later(self):
+        session = HistorySession(RuntimeError("connection reset"), 3, 3, 3, 4)
+        condition = table_version_changed(session, "main.silver.orders")
+        self.assertEqual(wait(condition).value, 4)
+
+    def test_existing_table_waits_for_a_new_version(self):
+        condition = table_version_changed(HistorySession(3, 3, 5), "main.silver.orders")
+        self.assertIn("after 3", condition.description)
+        self.assertEqual(wait(condition).value, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()